@@ -3,11 +3,11 @@
 维护数据库的元数据（表名、列名、列类型等）
 系统目录本身作为一张特殊的表进行存储和管理
 """
-import json
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
 from storage.storage_engine import StorageEngine, ColumnInfo, DataType, Record
+from storage.catalog_codec import encode_column_info, decode_column_dicts
 
 
 @dataclass
@@ -27,6 +27,7 @@ class SystemCatalog:
     def __init__(self, storage_engine: StorageEngine):
         self.storage_engine = storage_engine
         self.tables: Dict[str, TableMetadata] = {}
+        self.version = 0  # 每次表的增删时递增，供调用方判断缓存的表名是否过期
         self._initialize_catalog()
     
     def _initialize_catalog(self):
@@ -48,7 +49,7 @@ class SystemCatalog:
         """创建系统目录表"""
         columns = [
             ColumnInfo("table_name", DataType.VARCHAR),
-            ColumnInfo("column_info", DataType.VARCHAR),  # JSON格式存储列信息
+            ColumnInfo("column_info", DataType.VARCHAR),  # 二进制描述符存储列信息
             ColumnInfo("created_at", DataType.VARCHAR),
             ColumnInfo("page_count", DataType.INT)
         ]
@@ -71,15 +72,16 @@ class SystemCatalog:
             page_count = record.get_value("page_count") or 0
             
             try:
-                columns = json.loads(column_info_json) if column_info_json else []
+                columns = decode_column_dicts(column_info_json) if column_info_json else []
                 self.tables[table_name] = TableMetadata(
                     table_name=table_name,
                     columns=columns,
                     created_at=created_at,
                     page_count=page_count
                 )
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 print(f"解析表 {table_name} 的列信息失败: {e}")
+        self.version += 1
     
     def create_table(self, table_name: str, columns: List[Dict[str, str]]) -> bool:
         """在目录中注册新表"""
@@ -97,6 +99,7 @@ class SystemCatalog:
         )
         
         self.tables[table_name] = metadata
+        self.version += 1
         print(f"在目录中注册新表: {table_name}")
         
         # 保存到存储
@@ -127,6 +130,7 @@ class SystemCatalog:
         
         if deleted_count > 0:
             del self.tables[table_name]
+            self.version += 1
             return True
         
         return False
@@ -171,7 +175,7 @@ class SystemCatalog:
         # 插入新记录
         record_data = {
             "table_name": metadata.table_name,
-            "column_info": json.dumps(metadata.columns),
+            "column_info": encode_column_info(metadata.columns),
             "created_at": metadata.created_at,
             "page_count": metadata.page_count
         }
@@ -4,20 +4,52 @@
 提供统一的数据库接口
 """
 import os
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import List, Dict, Any, Optional, Iterable, Sequence
 from sql_compiler.lexer import SQLLexer
-from sql_compiler.parser import SQLParser
-from sql_compiler.semantic import SemanticAnalyzer, Catalog as SemanticCatalog
-from sql_compiler.planner import PlanGenerator
+from sql_compiler.parser import SQLParser, Placeholder
+from sql_compiler.semantic import (SemanticAnalyzer, Catalog as SemanticCatalog,
+                                   DataType as SemanticDataType)
+from sql_compiler.planner import PlanGenerator, ExecutionPlan, OperatorType
 from storage.storage_engine import StorageEngine, ColumnInfo, DataType
 from .execution_engine import ExecutionEngine
 from .catalog import SystemCatalog
 from utils.logger import DatabaseLogger, LogLevel, logger
 import time
 
+
+# 可批量绑定参数执行的语句类型
+_BATCH_OPERATORS = (OperatorType.INSERT, OperatorType.UPDATE, OperatorType.DELETE)
+# 计划缓存中的语句不含DDL，执行后无需更新目录
+_DDL_OPERATORS = (OperatorType.CREATE_TABLE,)
+
+# 参数的Python类型 -> 要求的列类型
+_PARAM_TYPES = {int: SemanticDataType.INT, str: SemanticDataType.VARCHAR}
+
+
+def _plan_table(plan: ExecutionPlan) -> Optional[str]:
+    """计划树中第一个带表名的节点的表名（Filter等算子本身不带表名）"""
+    for child in plan.children:
+        table_name = child.table_name or _plan_table(child)
+        if table_name:
+            return table_name
+    return None
+
+
+@dataclass
+class PreparedStatement:
+    """预编译语句：解析、语义检查、计划生成只做一次"""
+    plans: List[ExecutionPlan]
+    param_count: int
+    catalog_version: int
+
+
 class Database:
     """主数据库类"""
     
+    PREPARED_CACHE_SIZE = 256
+    
     def __init__(self, data_file: str = "database.db"):
         self.data_file = data_file
         self.storage_engine = StorageEngine(data_file)
@@ -30,6 +62,8 @@ class Database:
         self.semantic_catalog = SemanticCatalog()
         self.semantic_analyzer = SemanticAnalyzer(self.semantic_catalog)
         self.planner = PlanGenerator()
+        # 预编译语句缓存：规范化SQL文本 -> PreparedStatement（LRU）
+        self._prepared: OrderedDict = OrderedDict()
         
         # 同步语义目录和系统目录
         self._sync_catalogs()
@@ -53,16 +87,23 @@ class Database:
             if not self.semantic_catalog.table_exists(table_name):
                 self.semantic_catalog.create_table(table_name, column_infos)
     
-    def execute_sql(self, sql: str) -> Dict[str, Any]:
-        """执行SQL语句"""
+    def execute_sql(self, sql: str, params: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+        """执行SQL语句
+        
+        传入params时SQL按?占位符绑定参数，解析后的计划按SQL文本缓存，重复执行时跳过编译。
+        """
         now=time.time()
         try:
+            if params is not None:
+                return self._execute_prepared(sql, params, now)
+            
             # 1. 词法分析
             tokens = self.lexer.tokenize(sql)
             
             # 2. 语法分析
-            self.parser = SQLParser(tokens)
-            ast_nodes = self.parser.parse()
+            ast_nodes = self.parser.reset(tokens).parse()
+            if self.parser.placeholder_count:
+                raise ValueError("带?占位符的语句需传入参数执行")
             
             # 3. 语义分析
             semantic_results = self.semantic_analyzer.analyze(ast_nodes)
@@ -86,62 +127,180 @@ class Database:
             for i, plan in enumerate(plans):
                 print(f"  计划 {i}: {plan.operator_type.value}")
             
-            # 5. 执行计划
-            results = []
-            for plan in plans:
-                result = self.execution_engine.execute_plan(plan)
-                results.append(result)
+            return self._execute_plans(sql, plans, now)
                 
-                # 如果执行失败，返回错误
-                if not result.success:
-                    return {
-                        'sql':sql,
-                        'success': False,
-                        'message': result.message,
-                        'data': [],
-                        'duration': time.time() - now,
-                        'row_affected':0
-                    }
-            
-            # 6. 更新系统目录
-            self._update_catalog_from_plans(plans)
-            
-            # 7. 同步目录
-            self._sync_catalogs()
-            
-            # 8. 刷新数据
-            self.storage_engine.flush_all()
+        except Exception as e:
+            return {
+                'sql':sql,
+                'success': False,
+                'message': f'执行错误: {str(e)}',
+                'data': [],
+                'duration': time.time() - now,
+                'rows_affected': 0
+            }
+    
+    def _execute_prepared(self, sql: str, params: Sequence[Any], now: float) -> Dict[str, Any]:
+        """绑定参数后执行缓存的计划"""
+        prepared = self.prepare(sql)
+        if len(params) != prepared.param_count:
+            raise ValueError(f"参数个数({len(params)})与占位符个数({prepared.param_count})不匹配")
+        return self._execute_plans(sql, [self._bind_plan(plan, params) for plan in prepared.plans], now)
+    
+    def _execute_plans(self, sql: str, plans: List[ExecutionPlan], now: float) -> Dict[str, Any]:
+        """执行计划并更新目录、刷新数据（异常由调用方处理）"""
+        # 5. 执行计划
+        results = []
+        for plan in plans:
+            result = self.execution_engine.execute_plan(plan)
+            results.append(result)
             
-            # 返回结果
-            if results:
-                last_result = results[-1]
-                return {
-                    'sql':sql,
-                    'success': True,
-                    'message': last_result.message,
-                    'data': last_result.data,
-                    'rows_affected': last_result.rows_affected,
-                    'duration': time.time() - now
-                }
-            else:
+            # 如果执行失败，返回错误
+            if not result.success:
                 return {
                     'sql':sql,
-                    'success': True,
-                    'message': '执行完成',
+                    'success': False,
+                    'message': result.message,
                     'data': [],
                     'duration': time.time() - now,
-                    'rows_affected': 0
+                    'row_affected':0
                 }
-                
-        except Exception as e:
+        
+        # 6. 更新系统目录，7. 同步目录（仅建表语句会改变目录）
+        if any(plan.operator_type in _DDL_OPERATORS for plan in plans):
+            self._update_catalog_from_plans(plans)
+            self._sync_catalogs()
+        
+        # 8. 刷新数据
+        self.storage_engine.flush_all()
+        
+        # 返回结果
+        if results:
+            last_result = results[-1]
+            return {
+                'sql':sql,
+                'success': True,
+                'message': last_result.message,
+                'data': last_result.data,
+                'rows_affected': last_result.rows_affected,
+                'duration': time.time() - now
+            }
+        else:
             return {
                 'sql':sql,
+                'success': True,
+                'message': '执行完成',
+                'data': [],
+                'duration': time.time() - now,
+                'rows_affected': 0
+            }
+    
+    def prepare(self, sql: str) -> PreparedStatement:
+        """预编译带?占位符的语句，结果按规范化后的SQL文本缓存
+        
+        语法或语义错误时抛出ValueError。
+        """
+        key = " ".join(sql.split())
+        cache = self._prepared
+        prepared = cache.get(key)
+        if prepared is not None and prepared.catalog_version == self.semantic_catalog.version:
+            cache.move_to_end(key)
+            return prepared
+        
+        tokens = self.lexer.tokenize(sql)
+        parser = self.parser.reset(tokens)
+        ast_nodes = parser.parse()
+        
+        errors = [result for result in self.semantic_analyzer.analyze(ast_nodes)
+                  if result.startswith('[')]
+        if errors:
+            raise ValueError(f"语义分析错误: {'; '.join(errors)}")
+        
+        plans = self.planner.generate_plan(ast_nodes)
+        for plan in plans:
+            if plan.operator_type in _DDL_OPERATORS:
+                raise ValueError(f"不支持预编译的语句: {plan.operator_type.value}")
+        
+        prepared = PreparedStatement(plans, parser.placeholder_count,
+                                     self.semantic_catalog.version)
+        cache[key] = prepared
+        if len(cache) > self.PREPARED_CACHE_SIZE:
+            cache.popitem(last=False)
+        return prepared
+    
+    def execute_many(self, sql: str, params_rows: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """以多组参数执行同一条带?占位符的INSERT/UPDATE/DELETE语句
+        
+        语句只解析和生成计划一次，每组参数绑定到计划后直接执行；
+        整批写入期间暂停自动刷盘，结束时统一刷新一次。
+        整批不是原子的：某组参数失败时停止执行，之前各组的修改保留并刷盘，
+        返回的rows_affected为已生效的行数。
+        """
+        now = time.time()
+        rows_affected = 0
+        batches = 0
+        try:
+            prepared = self.prepare(sql)
+            for plan in prepared.plans:
+                if plan.operator_type not in _BATCH_OPERATORS:
+                    raise ValueError(f"不支持批量执行的语句: {plan.operator_type.value}")
+            self.storage_engine.begin_bulk()
+            try:
+                for params in params_rows:
+                    if len(params) != prepared.param_count:
+                        raise ValueError(f"第{batches + 1}组参数个数({len(params)})"
+                                         f"与占位符个数({prepared.param_count})不匹配")
+                    for plan in prepared.plans:
+                        result = self.execution_engine.execute_plan(self._bind_plan(plan, params))
+                        if not result.success:
+                            raise ValueError(f"第{batches + 1}组参数执行失败: {result.message}")
+                        rows_affected += result.rows_affected
+                    batches += 1
+            finally:
+                self.storage_engine.end_bulk()
+        except Exception as e:
+            return {
+                'sql': sql,
                 'success': False,
                 'message': f'执行错误: {str(e)}',
                 'data': [],
                 'duration': time.time() - now,
-                'rows_affected': 0
+                'rows_affected': rows_affected
             }
+        
+        return {
+            'sql': sql,
+            'success': True,
+            'message': f'批量执行完成: {batches}组参数',
+            'data': [],
+            'duration': time.time() - now,
+            'rows_affected': rows_affected
+        }
+    
+    def _bind_plan(self, plan: ExecutionPlan, params: Sequence[Any],
+                   table_name: Optional[str] = None) -> ExecutionPlan:
+        """将参数代入计划树中的占位符，同时检查参数类型"""
+        table_name = plan.table_name or table_name or _plan_table(plan)
+        
+        def bind(value, column):
+            if not isinstance(value, Placeholder):
+                return value
+            param = params[value.index]
+            if param is not None:
+                col_info = self.semantic_catalog.get_column(table_name, column)
+                expected = _PARAM_TYPES.get(type(param))
+                if col_info is not None and expected != col_info.data_type:
+                    raise ValueError(f"列 '{column}' 期望类型 {col_info.data_type.name}，"
+                                     f"实际参数 {param!r}")
+            return param
+        
+        values = plan.values
+        if values:
+            values = [bind(value, column) for column, value in zip(plan.columns, values)]
+        condition = plan.condition
+        if condition and isinstance(condition.get('value'), Placeholder):
+            condition = dict(condition, value=bind(condition['value'], condition['column']))
+        children = [self._bind_plan(child, params, table_name) for child in plan.children]
+        return replace(plan, values=values, condition=condition, children=children)
     
     def _update_catalog_from_plans(self, plans: List):
         """从执行计划更新系统目录"""
@@ -163,6 +322,11 @@ class Database:
         """获取所有表名"""
         return self.system_catalog.get_all_tables()
     
+    @property
+    def schema_version(self) -> int:
+        """表集合的版本号，建表或删表后变化"""
+        return self.system_catalog.version
+    
     def get_table_info(self, table_name: str) -> Optional[Dict[str, Any]]:
         """获取表信息"""
         metadata = self.system_catalog.get_table_metadata(table_name)
@@ -96,6 +96,11 @@ class EnhancedDatabase:
         logger.info("查看所有表格")
         return self.catalog.get_all_tables()
     
+    @property
+    def schema_version(self) -> int:
+        """表集合的版本号，建表或删表后变化"""
+        return self.catalog.version
+    
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """获取表信息"""
         metadata = self.catalog.get_table_metadata(table_name)
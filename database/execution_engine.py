@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from enum import Enum
 from abc import ABC, abstractmethod
 from sql_compiler.planner import ExecutionPlan, OperatorType
-from storage.storage_engine import StorageEngine, ColumnInfo, DataType, Record
+from storage.storage_engine import StorageEngine, ColumnInfo, DataType, Record, COMPARATORS
 
 
 class ExecutionResult:
@@ -96,7 +96,9 @@ class InsertOperator(ExecutionOperator):
         # 插入记录
         success = storage_engine.insert_record(self.table_name, record_data)
         if success:
-            return ExecutionResult(True, f"成功插入1条记录到表 '{self.table_name}'")
+            result = ExecutionResult(True, f"成功插入1条记录到表 '{self.table_name}'")
+            result.set_rows_affected(1)
+            return result
         else:
             return ExecutionResult(False, f"插入记录到表 '{self.table_name}' 失败")
 
@@ -153,10 +155,10 @@ class FilterOperator(ExecutionOperator):
             return True
         
         column = condition.get('column')
-        operator = condition.get('operator')
+        op = condition.get('operator')
         value = condition.get('value')
         
-        if not all([column, operator, value is not None]):
+        if not all([column, op, value is not None]):
             return False
         
         row_value = row.get(column)
@@ -180,20 +182,8 @@ class FilterOperator(ExecutionOperator):
         except (ValueError, AttributeError):
             return False
         
-        if operator == '=':
-            return row_value == value
-        elif operator == '>':
-            return row_value > value
-        elif operator == '<':
-            return row_value < value
-        elif operator == '>=':
-            return row_value >= value
-        elif operator == '<=':
-            return row_value <= value
-        elif operator == '!=':
-            return row_value != value
-        
-        return False
+        compare = COMPARATORS.get(op)
+        return compare(row_value, value) if compare is not None else False
 
 
 class ProjectOperator(ExecutionOperator):
@@ -248,9 +238,11 @@ class DeleteOperator(ExecutionOperator):
         deleted_count = storage_engine.delete_records(self.table_name, self.condition)
         
         if self.condition:
-            return ExecutionResult(True, f"从表 '{self.table_name}' 删除了 {deleted_count} 条记录")
+            result = ExecutionResult(True, f"从表 '{self.table_name}' 删除了 {deleted_count} 条记录")
         else:
-            return ExecutionResult(True, f"清空了表 '{self.table_name}' 的所有记录")
+            result = ExecutionResult(True, f"清空了表 '{self.table_name}' 的所有记录")
+        result.set_rows_affected(deleted_count)
+        return result
 
 
 class UpdateOperator(ExecutionOperator):
@@ -280,9 +272,11 @@ class UpdateOperator(ExecutionOperator):
         updated_count = storage_engine.update_records(self.table_name, update_data, self.condition)
         
         if self.condition:
-            return ExecutionResult(True, f"更新了表 '{self.table_name}' 中的 {updated_count} 条记录")
+            result = ExecutionResult(True, f"更新了表 '{self.table_name}' 中的 {updated_count} 条记录")
         else:
-            return ExecutionResult(True, f"更新了表 '{self.table_name}' 中的所有 {updated_count} 条记录")
+            result = ExecutionResult(True, f"更新了表 '{self.table_name}' 中的所有 {updated_count} 条记录")
+        result.set_rows_affected(updated_count)
+        return result
 
 
 class ExecutionEngine:
@@ -137,7 +137,7 @@ class PlanGenerator:
         values = []
         for value_node in value_list_node.children:
             if value_node.node_type == ASTNodeType.LITERAL:
-                values.append(value_node.value['value'])
+                values.append(value_node.value)
         
         return ExecutionPlan(
             operator_type=OperatorType.INSERT,
@@ -237,9 +237,9 @@ class PlanGenerator:
                 column_name = right.value
             
             if left.node_type == ASTNodeType.LITERAL:
-                value = left.value['value']
+                value = left.value
             elif right.node_type == ASTNodeType.LITERAL:
-                value = right.value['value']
+                value = right.value
             
             return {
                 'column': column_name,
@@ -261,7 +261,7 @@ class PlanGenerator:
                 column_name = assignment.value
                 value_node = assignment.children[0]
                 if value_node.node_type == ASTNodeType.LITERAL:
-                    assignments[column_name] = value_node.value['value']
+                    assignments[column_name] = value_node.value
         
         # 检查是否有WHERE子句
         if len(node.children) > 1:
@@ -7,7 +7,7 @@
 import time
 from typing import List, Dict, Any, Optional
 from .parser import ASTNode, ASTNodeType
-from storage.storage_engine import StorageEngine
+from storage.storage_engine import StorageEngine, COMPARATORS
 from database.catalog import SystemCatalog
 
 class ExecutionResult:
@@ -58,6 +58,13 @@ class EnhancedExecutionEngine:
             if not self.storage_engine.table_exists(table_name):
                 return ExecutionResult(False, f"表 '{table_name}' 不存在")
             
+            # 无WHERE等子句的 SELECT COUNT(*) 直接取表的记录数，不扫描数据
+            count_key = self._count_star_key(plan)
+            if count_key is not None:
+                count = self.storage_engine.count_records(table_name)
+                # 与一般路径一致：空表不返回行
+                return ExecutionResult(True, "查询完成", [{count_key: count}] if count else [])
+            
             # 获取所有数据
             data = self.storage_engine.select_records(table_name, {})
             
@@ -80,6 +87,21 @@ class EnhancedExecutionEngine:
         except Exception as e:
             return ExecutionResult(False, f"SELECT执行错误: {str(e)}")
     
+    def _count_star_key(self, plan: ASTNode) -> Optional[str]:
+        """SELECT列表只有COUNT(*)且没有其他子句时返回结果列名，否则返回None"""
+        items = plan.value['select_list'].children
+        if plan.children or len(items) != 1 or items[0].node_type != ASTNodeType.FUNCTION_CALL:
+            return None
+        value = items[0].value
+        if isinstance(value, dict) and 'expression' in value:
+            func_data, alias = value['expression'], value['alias']
+        else:
+            func_data, alias = value, None
+        argument = func_data.get('argument')
+        if func_data.get('function') != 'COUNT' or argument is None or argument.value != '*':
+            return None
+        return alias if alias else "COUNT(*)"
+    
     def _apply_where_clause(self, data: List[Dict], where_clause: ASTNode) -> List[Dict]:
         """应用WHERE子句"""
         filtered_data = []
@@ -274,31 +296,22 @@ class EnhancedExecutionEngine:
     def _evaluate_condition(self, row, condition: ASTNode) -> bool:
         """评估条件表达式"""
         if condition.node_type == ASTNodeType.COMPARISON:
-            left_value = self._evaluate_expression(row, condition.value['left'])
-            right_value = self._evaluate_expression(row, condition.value['right'])
-            operator = condition.value['operator']
+            left_value = self._evaluate_expression(row, condition.children[0])
+            right_value = self._evaluate_expression(row, condition.children[1])
+            operator = condition.value
             
             # 类型转换
             left_value = self._convert_to_number(left_value)
             right_value = self._convert_to_number(right_value)
             
-            if operator == '=':
-                return left_value == right_value
-            elif operator == '!=':
-                return left_value != right_value
-            elif operator == '>':
-                return left_value > right_value
-            elif operator == '<':
-                return left_value < right_value
-            elif operator == '>=':
-                return left_value >= right_value
-            elif operator == '<=':
-                return left_value <= right_value
+            compare = COMPARATORS.get(operator)
+            if compare is not None:
+                return compare(left_value, right_value)
         
         elif condition.node_type == ASTNodeType.LOGICAL_OP:
-            left_result = self._evaluate_condition(row, condition.value['left'])
-            right_result = self._evaluate_condition(row, condition.value['right'])
-            operator = condition.value['operator']
+            left_result = self._evaluate_condition(row, condition.children[0])
+            right_result = self._evaluate_condition(row, condition.children[1])
+            operator = condition.value
             
             if operator == 'AND':
                 return left_result and right_result
@@ -310,7 +323,7 @@ class EnhancedExecutionEngine:
     def _evaluate_expression(self, row: Dict, expr: ASTNode) -> Any:
         """评估表达式"""
         if expr.node_type == ASTNodeType.LITERAL:
-            return expr.value['value']
+            return expr.value
         elif expr.node_type == ASTNodeType.COLUMN_REF:
             return self._get_row_value(row, expr.value)
         else:
@@ -319,9 +332,9 @@ class EnhancedExecutionEngine:
     def _extract_condition_from_ast(self, condition: ASTNode) -> Dict[str, Any]:
         """从AST条件节点提取条件字典"""
         if condition.node_type == ASTNodeType.COMPARISON:
-            left = condition.value['left']
-            right = condition.value['right']
-            operator = condition.value['operator']
+            left = condition.children[0]
+            right = condition.children[1]
+            operator = condition.value
             
             # 提取列名和值
             column_name = None
@@ -333,9 +346,9 @@ class EnhancedExecutionEngine:
                 column_name = right.value
             
             if left.node_type == ASTNodeType.LITERAL:
-                value = left.value['value']
+                value = left.value
             elif right.node_type == ASTNodeType.LITERAL:
-                value = right.value['value']
+                value = right.value
             
             return {
                 'column': column_name,
@@ -6,7 +6,12 @@
 
 from typing import List, Optional, Dict, Any
 from .lexer import SQLLexer, Token, TokenType
-from .parser import ASTNode, ASTNodeType
+from .parser import ASTNode, ASTNodeType, LiteralNode, ColumnRefNode
+
+# SELECT列表的结束标记
+_SELECT_LIST_STOP = frozenset({TokenType.FROM, TokenType.EOF})
+# 括号内列表（如VALUES）只在匹配的右括号或EOF处结束
+_PAREN_LIST_STOP = frozenset({TokenType.EOF})
 
 class EnhancedSQLParser:
     """增强版SQL解析器"""
@@ -18,14 +23,42 @@ class EnhancedSQLParser:
     
     def parse(self, sql: str) -> ASTNode:
         """解析SQL语句"""
-        self.tokens = self.lexer.tokenize(sql)
-        self.current_token_index = 0
-        
-        if not self.tokens:
+        return self.parse_tokens(self.lexer.tokenize(sql))
+    
+    def parse_tokens(self, tokens: List[Token]) -> ASTNode:
+        """解析已完成词法分析的Token流，调用方已有tokens时可跳过重复分词"""
+        if not tokens:
             raise SyntaxError("空SQL语句")
         
+        self.reset(tokens)
         return self._parse_statement()
     
+    def parse_batch(self, sqls: List[str]) -> List[ASTNode]:
+        """批量解析多条SQL语句，按输入顺序返回AST列表
+        
+        在同一个调用帧内完成分词与解析，热路径上的方法只查找一次。
+        """
+        tokenize = self.lexer.tokenize
+        parse_statement = self._parse_statement
+        results = []
+        append = results.append
+        
+        for sql in sqls:
+            tokens = tokenize(sql)
+            if not tokens:
+                raise SyntaxError("空SQL语句")
+            self.tokens = tokens
+            self.current_token_index = 0
+            append(parse_statement())
+        
+        return results
+    
+    def reset(self, tokens: List[Token]) -> 'EnhancedSQLParser':
+        """重置解析状态以复用同一个解析器实例"""
+        self.tokens = tokens
+        self.current_token_index = 0
+        return self
+    
     def _current_token(self) -> Token:
         """获取当前token"""
         if self.current_token_index < len(self.tokens):
@@ -127,15 +160,43 @@ class EnhancedSQLParser:
         
         return select_node
     
+    def _count_list_items(self, stop_types: frozenset) -> int:
+        """从当前位置向后扫描，统计括号外以逗号分隔的列表项数（上界）
+        
+        扫描在stop_types中的token或未匹配的右括号处停止。
+        """
+        tokens = self.tokens
+        depth = 0
+        count = 1
+        for i in range(self.current_token_index, len(tokens)):
+            token_type = tokens[i].token_type
+            if token_type == TokenType.LEFT_PAREN:
+                depth += 1
+            elif token_type == TokenType.RIGHT_PAREN:
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0:
+                if token_type == TokenType.COMMA:
+                    count += 1
+                elif token_type in stop_types:
+                    break
+        return count
+    
     def _parse_select_list(self) -> ASTNode:
         """解析SELECT列表"""
         select_list = ASTNode(ASTNodeType.SELECT_LIST, [])
         
+        # 预先确定列数并一次性分配子节点列表
+        children = [None] * self._count_list_items(_SELECT_LIST_STOP)
+        k = 0
+        
         while True:
             if self._match(TokenType.MULTIPLY):
                 # 处理 *
                 self._next_token()
-                select_list.children.append(ASTNode(ASTNodeType.COLUMN_REF, "*"))
+                children[k] = ColumnRefNode("*")
+                k += 1
                 break
             else:
                 # 处理表达式或聚合函数
@@ -145,7 +206,8 @@ class EnhancedSQLParser:
                 else:
                     # 普通表达式
                     expr = self._parse_expression()
-                select_list.children.append(expr)
+                children[k] = expr
+                k += 1
                 
                 # 检查别名
                 if self._match(TokenType.AS):
@@ -162,6 +224,8 @@ class EnhancedSQLParser:
                 else:
                     break
         
+        del children[k:]
+        select_list.children = children
         return select_list
     
     def _parse_expression(self) -> ASTNode:
@@ -169,15 +233,15 @@ class EnhancedSQLParser:
         if self._match(TokenType.IDENTIFIER):
             # 列引用
             token = self._next_token()
-            return ASTNode(ASTNodeType.COLUMN_REF, token.lexeme)
+            return ColumnRefNode(token.lexeme)
         elif self._match(TokenType.NUMBER):
             # 数字字面量
             token = self._next_token()
-            return ASTNode(ASTNodeType.LITERAL, {'value': int(token.lexeme)})
+            return LiteralNode(int(token.lexeme), 'number')
         elif self._match(TokenType.STRING):
             # 字符串字面量
             token = self._next_token()
-            return ASTNode(ASTNodeType.LITERAL, {'value': token.lexeme})
+            return LiteralNode(token.lexeme, 'string')
         else:
             raise SyntaxError(f"无效的表达式: {self._current_token().lexeme}")
     
@@ -191,7 +255,7 @@ class EnhancedSQLParser:
         if self._match(TokenType.MULTIPLY):
             # COUNT(*)
             self._next_token()
-            arg = ASTNode(ASTNodeType.COLUMN_REF, "*")
+            arg = ColumnRefNode("*")
         else:
             # 其他聚合函数的参数
             arg = self._parse_expression()
@@ -223,11 +287,8 @@ class EnhancedSQLParser:
             self._next_token()
             right = self._parse_comparison()
             
-            left = ASTNode(ASTNodeType.LOGICAL_OP, {
-                'left': left,
-                'operator': op_token.lexeme.upper(),
-                'right': right
-            })
+            # 操作数放在children中，value只保存操作符
+            left = ASTNode(ASTNodeType.LOGICAL_OP, op_token.lexeme.upper(), [left, right])
         
         return left
     
@@ -242,46 +303,63 @@ class EnhancedSQLParser:
             self._next_token()
             right = self._parse_expression()
             
-            return ASTNode(ASTNodeType.COMPARISON, {
-                'left': left,
-                'operator': operator,
-                'right': right
-            })
+            return ASTNode(ASTNodeType.COMPARISON, operator, [left, right])
         else:
             return left
     
-    def _parse_group_by(self) -> ASTNode:
-        """解析GROUP BY子句"""
-        columns = []
+    def _parse_identifier_list(self, error_message: str) -> List[str]:
+        """解析以逗号分隔的标识符列表
+        
+        先在token列表上扫描确定列表边界（不经过_match/_next_token），再一次性切片取出。
+        token流总以EOF结尾，而标识符和逗号都不是EOF，因此下标不会越界。
+        """
+        tokens = self.tokens
+        start = i = self.current_token_index
         while True:
-            column = self._consume(TokenType.IDENTIFIER, "期望列名").lexeme
-            columns.append(column)
+            token = tokens[i]
+            if token.token_type != TokenType.IDENTIFIER:
+                self.current_token_index = i
+                raise SyntaxError(f"语法错误: {error_message} (行{token.line}, 列{token.column})")
+            i += 1
             
-            if self._match(TokenType.COMMA):
-                self._next_token()
-            else:
+            if tokens[i].token_type != TokenType.COMMA:
                 break
+            i += 1
         
+        self.current_token_index = i
+        # 边界确定后一次性取出标识符（位于起点之后的偶数位置）
+        return [token.lexeme for token in tokens[start:i:2]]
+    
+    def _parse_group_by(self) -> ASTNode:
+        """解析GROUP BY子句"""
+        columns = self._parse_identifier_list("期望列名")
         return ASTNode(ASTNodeType.GROUP_BY, columns)
     
     def _parse_order_by(self) -> ASTNode:
         """解析ORDER BY子句"""
+        tokens = self.tokens
+        i = self.current_token_index
         columns = []
         while True:
-            column = self._consume(TokenType.IDENTIFIER, "期望列名").lexeme
-            direction = "ASC"
+            token = tokens[i]
+            if token.token_type != TokenType.IDENTIFIER:
+                self.current_token_index = i
+                raise SyntaxError(f"语法错误: 期望列名 (行{token.line}, 列{token.column})")
+            i += 1
             
-            if self._match(TokenType.ASC) or self._match(TokenType.DESC):
-                direction = self._current_token().lexeme.upper()
-                self._next_token()
+            direction = "ASC"
+            direction_token = tokens[i]
+            if direction_token.token_type == TokenType.ASC or direction_token.token_type == TokenType.DESC:
+                direction = direction_token.lexeme.upper()
+                i += 1
             
-            columns.append({'column': column, 'direction': direction})
+            columns.append({'column': token.lexeme, 'direction': direction})
             
-            if self._match(TokenType.COMMA):
-                self._next_token()
-            else:
+            if tokens[i].token_type != TokenType.COMMA:
                 break
+            i += 1
         
+        self.current_token_index = i
         return ASTNode(ASTNodeType.ORDER_BY, columns)
     
     def _parse_limit(self) -> ASTNode:
@@ -363,21 +441,15 @@ class EnhancedSQLParser:
         
         # 解析列列表
         self._consume(TokenType.LEFT_PAREN, "期望左括号")
-        columns = []
-        while True:
-            col = self._consume(TokenType.IDENTIFIER, "期望列名").lexeme
-            columns.append(col)
-            if self._match(TokenType.COMMA):
-                self._next_token()
-            else:
-                break
+        columns = self._parse_identifier_list("期望列名")
         self._consume(TokenType.RIGHT_PAREN, "期望右括号")
         
         # 解析VALUES
         self._consume(TokenType.VALUES, "期望VALUES关键字")
         self._consume(TokenType.LEFT_PAREN, "期望左括号")
         
-        values = []
+        values = [None] * self._count_list_items(_PAREN_LIST_STOP)
+        k = 0
         while True:
             if self._match(TokenType.NUMBER):
                 val = int(self._current_token().lexeme)
@@ -388,12 +460,14 @@ class EnhancedSQLParser:
             else:
                 raise SyntaxError("期望值")
             
-            values.append(val)
+            values[k] = val
+            k += 1
             
             if self._match(TokenType.COMMA):
                 self._next_token()
             else:
                 break
+        del values[k:]
         
         self._consume(TokenType.RIGHT_PAREN, "期望右括号")
         
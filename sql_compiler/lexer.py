@@ -58,6 +58,7 @@ class TokenType(Enum):
     NUMBER = "NUMBER"
     STRING = "STRING"
     WILDCARD = "WILDCARD"  # *
+    PLACEHOLDER = "PLACEHOLDER"  # ? 参数占位符
     
     # 运算符
     EQUAL = "EQUAL"
@@ -173,6 +174,7 @@ class SQLLexer:
             ']': TokenType.RIGHT_BRACKET,
             '.': TokenType.DOT,
             '`': TokenType.BACKTICK,
+            '?': TokenType.PLACEHOLDER,
         }
     
     def tokenize(self, input_text: str) -> List[Token]:
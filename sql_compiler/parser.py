@@ -3,8 +3,8 @@ SQL语法分析器
 基于递归下降方法构建抽象语法树(AST)
 支持CREATE TABLE、INSERT、SELECT、DELETE四类语句
 """
+import sys
 from typing import List, Optional, Union, Dict, Any
-from dataclasses import dataclass
 from enum import Enum
 from .lexer import Token, TokenType, SQLLexer
 
@@ -44,16 +44,15 @@ class ASTNodeType(Enum):
     ASSIGNMENT = "ASSIGNMENT"
 
 
-@dataclass
 class ASTNode:
     """抽象语法树节点"""
-    node_type: ASTNodeType
-    value: Optional[Any] = None
-    children: List['ASTNode'] = None
+    __slots__ = ('node_type', 'value', 'children')
     
-    def __post_init__(self):
-        if self.children is None:
-            self.children = []
+    def __init__(self, node_type: ASTNodeType, value: Optional[Any] = None,
+                 children: Optional[List['ASTNode']] = None):
+        self.node_type = node_type
+        self.value = value
+        self.children = children if children is not None else []
     
     def add_child(self, child: 'ASTNode'):
         """添加子节点"""
@@ -63,6 +62,56 @@ class ASTNode:
         return f"ASTNode({self.node_type.value}, {self.value}, {len(self.children)} children)"
 
 
+# 参数占位符字面量的类型名
+PLACEHOLDER_TYPE = "placeholder"
+
+
+class Placeholder:
+    """参数占位符，index为其在语句中的序号（从0开始），执行时绑定实际值"""
+    __slots__ = ('index',)
+    
+    def __init__(self, index: int):
+        self.index = index
+    
+    def __repr__(self):
+        return f"?{self.index}"
+
+
+class LiteralNode:
+    """字面量节点（轻量级，无属性字典）"""
+    __slots__ = ('node_type', 'value', 'type', 'children')
+    
+    def __init__(self, value: Any, value_type: str):
+        self.node_type = ASTNodeType.LITERAL
+        self.value = value
+        self.type = value_type  # "number"、"string" 或 "placeholder"
+        self.children = []
+    
+    def add_child(self, child: 'ASTNode'):
+        """添加子节点"""
+        self.children.append(child)
+    
+    def __repr__(self):
+        return f"LiteralNode({self.value!r}, {self.type})"
+
+
+class ColumnRefNode:
+    """列引用节点（轻量级，无属性字典）"""
+    __slots__ = ('node_type', 'value', 'children')
+    
+    def __init__(self, name: str):
+        self.node_type = ASTNodeType.COLUMN_REF
+        self.value = name
+        self.children = []
+    
+    def add_child(self, child: 'ASTNode'):
+        """添加子节点"""
+        self.children.append(child)
+    
+    def __repr__(self):
+        return f"ColumnRefNode({self.value})"
+
+
 class ParserError(Exception):
     """语法分析错误"""
     def __init__(self, message: str, line: int, column: int):
@@ -79,6 +128,15 @@ class SQLParser:
         self.tokens = tokens
         self.current_token_index = 0
         self.current_token = tokens[0] if tokens else None
+        self.placeholder_count = 0
+    
+    def reset(self, tokens: List[Token]) -> 'SQLParser':
+        """重置解析状态以复用同一个解析器实例"""
+        self.tokens = tokens
+        self.current_token_index = 0
+        self.current_token = tokens[0] if tokens else None
+        self.placeholder_count = 0
+        return self
     
     def parse(self) -> List[ASTNode]:
         """解析Token流，返回AST节点列表"""
@@ -182,10 +240,10 @@ class SQLParser:
             if self._check(TokenType.MULTIPLY):
                 # 处理 * 通配符
                 self._advance()
-                column_list_node.add_child(ASTNode(ASTNodeType.COLUMN_REF, "*"))
+                column_list_node.add_child(ColumnRefNode("*"))
             else:
-                column_name = self._consume(TokenType.IDENTIFIER, "期望列名").lexeme
-                column_list_node.add_child(ASTNode(ASTNodeType.COLUMN_REF, column_name))
+                column_name = sys.intern(self._consume(TokenType.IDENTIFIER, "期望列名").lexeme)
+                column_list_node.add_child(ColumnRefNode(column_name))
             
             if self._check(TokenType.COMMA):
                 self._advance()
@@ -213,10 +271,10 @@ class SQLParser:
             if self._check(TokenType.MULTIPLY):
                 # 处理 * 通配符
                 self._advance()
-                column_list_node.add_child(ASTNode(ASTNodeType.COLUMN_REF, "*"))
+                column_list_node.add_child(ColumnRefNode("*"))
             else:
-                column_name = self._consume(TokenType.IDENTIFIER, "期望列名").lexeme
-                column_list_node.add_child(ASTNode(ASTNodeType.COLUMN_REF, column_name))
+                column_name = sys.intern(self._consume(TokenType.IDENTIFIER, "期望列名").lexeme)
+                column_list_node.add_child(ColumnRefNode(column_name))
             
             if self._check(TokenType.COMMA):
                 self._advance()
@@ -324,19 +382,18 @@ class SQLParser:
     def _parse_primary(self) -> ASTNode:
         """解析基本表达式"""
         if self._match(TokenType.NUMBER):
-            return ASTNode(ASTNodeType.LITERAL, {
-                'type': 'number',
-                'value': self._previous().lexeme
-            })
+            return LiteralNode(self._previous().lexeme, 'number')
         
         if self._match(TokenType.STRING):
-            return ASTNode(ASTNodeType.LITERAL, {
-                'type': 'string',
-                'value': self._previous().lexeme
-            })
+            return LiteralNode(self._previous().lexeme, 'string')
+        
+        if self._match(TokenType.PLACEHOLDER):
+            placeholder = Placeholder(self.placeholder_count)
+            self.placeholder_count += 1
+            return LiteralNode(placeholder, PLACEHOLDER_TYPE)
         
         if self._match(TokenType.IDENTIFIER):
-            return ASTNode(ASTNodeType.COLUMN_REF, self._previous().lexeme)
+            return ColumnRefNode(sys.intern(self._previous().lexeme))
         
         if self._match(TokenType.LEFT_PAREN):
             expr = self._parse_expression()
@@ -3,16 +3,34 @@ SQL语义分析器
 进行表/列存在性检查、类型一致性检查、列数/列序检查
 维护系统目录(Catalog)
 """
-from typing import Dict, List, Optional, Any, Set
+import sys
+from typing import Dict, List, Optional, Any, Set, FrozenSet
 from dataclasses import dataclass
-from enum import Enum
-from .parser import ASTNode, ASTNodeType
+from enum import IntEnum
+from .parser import ASTNode, ASTNodeType, PLACEHOLDER_TYPE
 
 
-class DataType(Enum):
-    """数据类型枚举"""
-    INT = "INT"
-    VARCHAR = "VARCHAR"
+class DataType(IntEnum):
+    """数据类型枚举（整数值用作类型兼容矩阵的下标）"""
+    INT = 0
+    VARCHAR = 1
+
+
+# 字面量类型 -> 兼容矩阵列下标
+_VALUE_TYPE_IDS = {"number": 0, "string": 1}
+
+# 类型兼容矩阵: _TYPE_COMPAT[列类型][字面量类型]
+_TYPE_COMPAT = (
+    (True, False),   # INT
+    (False, True),   # VARCHAR
+)
+
+
+def is_type_compatible(expected_type_id: int, value_type_id: int) -> bool:
+    """检查字面量类型是否与列类型兼容（参数均为整数类型编号，未知字面量类型传-1）"""
+    if value_type_id < 0:
+        return False
+    return _TYPE_COMPAT[expected_type_id][value_type_id]
 
 
 @dataclass
@@ -29,6 +47,15 @@ class TableInfo:
     name: str
     columns: Dict[str, ColumnInfo]
     column_order: List[str]  # 列的顺序
+    column_name_set: FrozenSet[str] = frozenset()  # 列名集合，用于快速存在性检查
+
+
+@dataclass
+class _StmtCtx:
+    """单条语句的分析上下文，表信息在语句开始时查找一次"""
+    table: TableInfo
+    columns: Dict[str, ColumnInfo]
+    column_set: FrozenSet[str]
 
 
 class SemanticError(Exception):
@@ -46,19 +73,25 @@ class Catalog:
     
     def __init__(self):
         self.tables: Dict[str, TableInfo] = {}
+        self.version = 0  # 每次表结构变化时递增，用于使预编译语句的缓存失效
     
     def create_table(self, table_name: str, columns: List[ColumnInfo]) -> None:
         """创建表"""
         if table_name in self.tables:
             raise SemanticError("TABLE_EXISTS", 0, 0, f"表 '{table_name}' 已存在")
         
+        table_name = sys.intern(table_name)
         column_dict = {}
         column_order = []
         for col in columns:
-            column_dict[col.name] = col
-            column_order.append(col.name)
+            col_name = sys.intern(col.name)
+            # 统一转换为本模块的DataType（调用方可能传入存储引擎的ColumnInfo）
+            column_dict[col_name] = ColumnInfo(col_name, DataType[col.data_type.name], col.nullable)
+            column_order.append(col_name)
         
-        self.tables[table_name] = TableInfo(table_name, column_dict, column_order)
+        self.tables[table_name] = TableInfo(table_name, column_dict, column_order,
+                                            frozenset(column_dict))
+        self.version += 1
     
     def get_table(self, table_name: str) -> Optional[TableInfo]:
         """获取表信息"""
@@ -77,7 +110,8 @@ class Catalog:
     
     def column_exists(self, table_name: str, column_name: str) -> bool:
         """检查列是否存在"""
-        return self.get_column(table_name, column_name) is not None
+        table = self.tables.get(table_name)
+        return table is not None and column_name in table.column_name_set
 
 
 class SemanticAnalyzer:
@@ -85,6 +119,20 @@ class SemanticAnalyzer:
     
     def __init__(self, catalog: Catalog):
         self.catalog = catalog
+        
+        # 语句级分派表
+        self.statement_handlers = {
+            ASTNodeType.CREATE_TABLE: self._analyze_create_table,
+            ASTNodeType.INSERT: self._analyze_insert,
+            ASTNodeType.SELECT: self._analyze_select,
+            ASTNodeType.DELETE: self._analyze_delete,
+        }
+        
+        # 表达式级分派表，未登记的节点类型只遍历其子节点
+        self.expression_handlers = {
+            ASTNodeType.COLUMN_REF: self._analyze_column_ref,
+            ASTNodeType.COMPARISON: self._analyze_comparison,
+        }
     
     def analyze(self, ast_nodes: List[ASTNode]) -> List[str]:
         """分析AST节点列表，返回分析结果"""
@@ -102,17 +150,18 @@ class SemanticAnalyzer:
     
     def _analyze_node(self, node: ASTNode) -> Optional[str]:
         """分析单个AST节点"""
-        if node.node_type == ASTNodeType.CREATE_TABLE:
-            return self._analyze_create_table(node)
-        elif node.node_type == ASTNodeType.INSERT:
-            return self._analyze_insert(node)
-        elif node.node_type == ASTNodeType.SELECT:
-            return self._analyze_select(node)
-        elif node.node_type == ASTNodeType.DELETE:
-            return self._analyze_delete(node)
-        
+        handler = self.statement_handlers.get(node.node_type)
+        if handler:
+            return handler(node)
         return None
     
+    def _make_ctx(self, table_name: str) -> _StmtCtx:
+        """查找语句所引用的表并构建分析上下文"""
+        table_info = self.catalog.tables.get(table_name)
+        if table_info is None:
+            raise SemanticError("TABLE_NOT_EXISTS", 0, 0, f"表 '{table_name}' 不存在")
+        return _StmtCtx(table_info, table_info.columns, table_info.column_name_set)
+    
     def _analyze_create_table(self, node: ASTNode) -> str:
         """分析CREATE TABLE语句"""
         table_name = node.value
@@ -127,7 +176,7 @@ class SemanticAnalyzer:
             if child.node_type == ASTNodeType.COLUMN_DEF:
                 col_info = ColumnInfo(
                     name=child.value['name'],
-                    data_type=DataType(child.value['type'])
+                    data_type=DataType[child.value['type']]
                 )
                 columns.append(col_info)
         
@@ -145,10 +194,8 @@ class SemanticAnalyzer:
         table_name = node.value
         
         # 检查表是否存在
-        if not self.catalog.table_exists(table_name):
-            raise SemanticError("TABLE_NOT_EXISTS", 0, 0, f"表 '{table_name}' 不存在")
-        
-        table_info = self.catalog.get_table(table_name)
+        ctx = self._make_ctx(table_name)
+        columns = ctx.columns
         
         # 获取列列表和值列表
         column_list_node = node.children[0]
@@ -159,26 +206,24 @@ class SemanticAnalyzer:
             raise SemanticError("COLUMN_COUNT_MISMATCH", 0, 0, 
                               f"列数({len(column_list_node.children)})与值数({len(value_list_node.children)})不匹配")
         
-        # 检查列是否存在
-        for col_node in column_list_node.children:
-            if col_node.node_type == ASTNodeType.COLUMN_REF:
-                col_name = col_node.value
-                if not self.catalog.column_exists(table_name, col_name):
-                    raise SemanticError("COLUMN_NOT_EXISTS", 0, 0, f"列 '{col_name}' 不存在")
-        
-        # 检查类型一致性
-        for i, (col_node, value_node) in enumerate(zip(column_list_node.children, value_list_node.children)):
-            if col_node.node_type == ASTNodeType.COLUMN_REF:
-                col_name = col_node.value
-                col_info = self.catalog.get_column(table_name, col_name)
+        # 单次遍历：检查列是否存在及类型一致性
+        for col_node, value_node in zip(column_list_node.children, value_list_node.children):
+            if col_node.node_type != ASTNodeType.COLUMN_REF:
+                continue
+            
+            col_name = col_node.value
+            col_info = columns.get(col_name)
+            if col_info is None:
+                raise SemanticError("COLUMN_NOT_EXISTS", 0, 0, f"列 '{col_name}' 不存在")
+            
+            # 占位符的类型在绑定参数时检查
+            if value_node.node_type == ASTNodeType.LITERAL and value_node.type != PLACEHOLDER_TYPE:
+                value_type = value_node.type
+                expected_type = col_info.data_type
                 
-                if col_info and value_node.node_type == ASTNodeType.LITERAL:
-                    value_type = value_node.value['type']
-                    expected_type = col_info.data_type.value
-                    
-                    if not self._is_type_compatible(value_type, expected_type):
-                        raise SemanticError("TYPE_MISMATCH", 0, 0, 
-                                          f"列 '{col_name}' 期望类型 {expected_type}，实际类型 {value_type}")
+                if not is_type_compatible(expected_type, _VALUE_TYPE_IDS.get(value_type, -1)):
+                    raise SemanticError("TYPE_MISMATCH", 0, 0, 
+                                      f"列 '{col_name}' 期望类型 {expected_type.name}，实际类型 {value_type}")
         
         return f"语义检查通过: 成功插入到表 '{table_name}'"
     
@@ -187,23 +232,23 @@ class SemanticAnalyzer:
         table_name = node.value
         
         # 检查表是否存在
-        if not self.catalog.table_exists(table_name):
-            raise SemanticError("TABLE_NOT_EXISTS", 0, 0, f"表 '{table_name}' 不存在")
+        ctx = self._make_ctx(table_name)
         
         # 检查列是否存在
+        column_name_set = ctx.column_set
         column_list_node = node.children[0]
         for col_node in column_list_node.children:
             if col_node.node_type == ASTNodeType.COLUMN_REF:
                 col_name = col_node.value
                 # 跳过 * 通配符
-                if col_name != "*" and not self.catalog.column_exists(table_name, col_name):
+                if col_name != "*" and col_name not in column_name_set:
                     raise SemanticError("COLUMN_NOT_EXISTS", 0, 0, f"列 '{col_name}' 不存在")
         
         # 检查WHERE子句
         if len(node.children) > 1:  # 有WHERE子句
             where_node = node.children[1]
             if where_node.node_type == ASTNodeType.WHERE_CLAUSE:
-                self._analyze_where_clause(where_node, table_name)
+                self._analyze_where_clause(where_node, ctx)
         
         return f"语义检查通过: 成功查询表 '{table_name}'"
     
@@ -212,59 +257,59 @@ class SemanticAnalyzer:
         table_name = node.value
         
         # 检查表是否存在
-        if not self.catalog.table_exists(table_name):
-            raise SemanticError("TABLE_NOT_EXISTS", 0, 0, f"表 '{table_name}' 不存在")
+        ctx = self._make_ctx(table_name)
         
         # 检查WHERE子句
         if len(node.children) > 0:  # 有WHERE子句
             where_node = node.children[0]
             if where_node.node_type == ASTNodeType.WHERE_CLAUSE:
-                self._analyze_where_clause(where_node, table_name)
+                self._analyze_where_clause(where_node, ctx)
         
         return f"语义检查通过: 成功删除表 '{table_name}' 中的记录"
     
-    def _analyze_where_clause(self, where_node: ASTNode, table_name: str) -> None:
+    def _analyze_where_clause(self, where_node: ASTNode, ctx: _StmtCtx) -> None:
         """分析WHERE子句"""
         condition_node = where_node.children[0]
-        self._analyze_expression(condition_node, table_name)
+        self._analyze_expression(condition_node, ctx)
     
-    def _analyze_expression(self, node: ASTNode, table_name: str) -> None:
-        """分析表达式"""
-        if node.node_type == ASTNodeType.COLUMN_REF:
-            col_name = node.value
-            if not self.catalog.column_exists(table_name, col_name):
-                raise SemanticError("COLUMN_NOT_EXISTS", 0, 0, f"列 '{col_name}' 不存在")
+    def _analyze_expression(self, node: ASTNode, ctx: _StmtCtx) -> None:
+        """分析表达式（显式栈深度优先遍历，每个节点只访问一次）"""
+        handlers = self.expression_handlers
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            handler = handlers.get(node.node_type)
+            if handler:
+                handler(node, ctx, stack)
+            else:
+                stack.extend(reversed(node.children))
+    
+    def _analyze_column_ref(self, node: ASTNode, ctx: _StmtCtx, stack: List[ASTNode]) -> None:
+        """分析列引用"""
+        col_name = node.value
+        if col_name not in ctx.column_set:
+            raise SemanticError("COLUMN_NOT_EXISTS", 0, 0, f"列 '{col_name}' 不存在")
+    
+    def _analyze_comparison(self, node: ASTNode, ctx: _StmtCtx, stack: List[ASTNode]) -> None:
+        """分析比较表达式"""
+        left = node.children[0]
+        right = node.children[1]
         
-        elif node.node_type == ASTNodeType.COMPARISON:
-            # 检查比较表达式的左右操作数
-            left = node.children[0]
-            right = node.children[1]
-            
-            self._analyze_expression(left, table_name)
-            self._analyze_expression(right, table_name)
+        # 检查类型兼容性（列不存在时由左操作数的列引用检查报错）
+        if (left.node_type == ASTNodeType.COLUMN_REF and 
+            right.node_type == ASTNodeType.LITERAL):
+            col_name = left.value
+            col_info = ctx.columns.get(col_name)
+            value_type = right.type
             
-            # 检查类型兼容性
-            if (left.node_type == ASTNodeType.COLUMN_REF and 
-                right.node_type == ASTNodeType.LITERAL):
-                col_name = left.value
-                col_info = self.catalog.get_column(table_name, col_name)
-                value_type = right.value['type']
-                
-                if col_info and not self._is_type_compatible(value_type, col_info.data_type.value):
-                    raise SemanticError("TYPE_MISMATCH", 0, 0, 
-                                      f"列 '{col_name}' 与值类型不匹配")
+            if col_info and value_type != PLACEHOLDER_TYPE and not is_type_compatible(col_info.data_type,
+                                                   _VALUE_TYPE_IDS.get(value_type, -1)):
+                raise SemanticError("TYPE_MISMATCH", 0, 0, 
+                                  f"列 '{col_name}' 与值类型不匹配")
         
-        # 递归分析子节点
-        for child in node.children:
-            self._analyze_expression(child, table_name)
-    
-    def _is_type_compatible(self, value_type: str, expected_type: str) -> bool:
-        """检查类型是否兼容"""
-        if expected_type == "INT":
-            return value_type == "number"
-        elif expected_type == "VARCHAR":
-            return value_type == "string"
-        return False
+        # 左右操作数各检查一次，左操作数先出栈
+        stack.append(right)
+        stack.append(left)
 
 
 def main():
@@ -3,10 +3,14 @@
 实现页缓存机制，支持LRU替换策略
 提供缓存命中统计与替换日志输出功能
 """
-from typing import Dict, Optional, List
-from collections import OrderedDict
+from typing import Dict, Optional, List, Set, Tuple
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from enum import Enum
+import heapq
+import itertools
+import sys
+import threading
 import time
 from storage.page_manager import Page, PageManager
 from utils.logger import logger
@@ -18,17 +22,28 @@ class ReplacementPolicy(Enum):
     LRFU = "LRFU"  # 最近最少使用，最少访问
 
 
-@dataclass
+# 替换策略对应的整数编号，热路径上用整数比较代替枚举比较
+_POLICY_LRU = 0
+_POLICY_FIFO = 1
+_POLICY_LRFU = 2
+_POLICY_IDS = {
+    ReplacementPolicy.LRU: _POLICY_LRU,
+    ReplacementPolicy.FIFO: _POLICY_FIFO,
+    ReplacementPolicy.LRFU: _POLICY_LRFU,
+}
+
+
+@dataclass(slots=True)
 class CacheEntry:
     """缓存条目"""
     page: Page
-    access_time: float
+    access_time: int  # monotonic_ns，仅LRFU策略记录
     access_count: int
     is_dirty: bool = False
     score: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheStats:
     """缓存统计信息"""
     hits: int = 0
@@ -54,99 +69,206 @@ class CacheManager:
     
     def __init__(self, page_manager: PageManager, max_size: int = 100, 
                  policy: ReplacementPolicy = ReplacementPolicy.LRU,
-                 decay: float = 0.5):
+                 decay: float = 0.5, high_watermark: float = 0.75,
+                 low_watermark: float = 0.5, eviction_log_size: int = 1024):
         self.page_manager = page_manager
         self.max_size = max_size
         self.policy = policy
+        self._policy_id = _POLICY_IDS[policy]
         self.decay = decay
+        # 脏页水位：超过高水位时提前写回，直到低于低水位
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        # 当前脏页ID集合，刷新时只遍历脏页
+        self._dirty: Set[int] = set()
         self.cache: OrderedDict[int, CacheEntry] = OrderedDict()
         self.stats = CacheStats()
-        self.eviction_log: List[Dict] = []
+        # 驱逐日志只保留最近eviction_log_size条
+        self.eviction_log: deque = deque(maxlen=eviction_log_size)
+        # LRFU: (score, version, page_id)最小堆，过期条目在驱逐时惰性跳过
+        self._lrfu_heap: List[Tuple[float, int, int]] = []
+        self._version: Dict[int, int] = {}
+        self._version_seq = 0
+        # 被驱逐条目的空闲链表，未命中时复用以避免重复分配
+        self._entry_pool: List[CacheEntry] = []
+        # 策略在构造后不变，命中处理函数只绑定一次
+        self._on_hit = {
+            ReplacementPolicy.LRU: self._hit_lru,
+            ReplacementPolicy.FIFO: self._hit_fifo,
+            ReplacementPolicy.LRFU: self._hit_lrfu,
+        }[policy]
+        # 元数据锁只保护缓存结构；页的磁盘读写使用各自的页锁
+        # 加锁顺序固定为先元数据锁后页锁
+        self._meta_lock = threading.RLock()
+        self._page_locks: Dict[int, threading.Lock] = {}
+    
+    def _page_lock(self, page_id: int) -> threading.Lock:
+        """获取页锁，不存在时创建"""
+        lock = self._page_locks.get(page_id)
+        if lock is None:
+            lock = self._page_locks.setdefault(page_id, threading.Lock())
+        return lock
+    
+    def _write_back(self, page_id: int, page: Page) -> bool:
+        """在页锁保护下写回页"""
+        with self._page_lock(page_id):
+            return self.page_manager.write_page(page_id, page)
     
     def get_page(self, page_id: int) -> Optional[Page]:
         """获取页，优先从缓存中获取"""
-        self.stats.total_requests += 1
-        
-        if page_id in self.cache:
-            # 缓存命中
-            self.stats.hits += 1
-            entry = self.cache[page_id]
-            entry.access_time = time.time()
-            entry.access_count += 1
-
-            if self.policy == ReplacementPolicy.LRFU:
-                entry.score = self.decay * entry.score + 1
+        with self._meta_lock:
+            self.stats.total_requests += 1
             
-            # 更新LRU顺序
-            if self.policy == ReplacementPolicy.LRU:
-                self.cache.move_to_end(page_id)
+            entry = self.cache.get(page_id)
+            if entry is not None:
+                # 缓存命中
+                self.stats.hits += 1
+                entry.access_count += 1
+                self._on_hit(entry, page_id)
+                
+                logger.log_cache_operation("读取",page_id=page_id,hit=True)
+                return entry.page
             
-            logger.log_cache_operation("读取",page_id=page_id,hit=True)
-            return entry.page
-        else:
             # 缓存未命中
             self.stats.misses += 1
-            
-            # 从存储管理器读取页
+        
+        # 释放元数据锁后从存储管理器读取页，不同页的读取可以并行
+        with self._page_lock(page_id):
             page = self.page_manager.read_page(page_id)
-            if page is None:
-                return None
+        if page is None:
+            return None
+        
+        with self._meta_lock:
+            # 读取期间其他线程可能已经加载了该页
+            entry = self.cache.get(page_id)
+            if entry is not None:
+                return entry.page
             
             # 添加到缓存
             self._add_to_cache(page_id, page)
-            
-            return page
+        
+        return page
+    
+    def _hit_lru(self, entry: CacheEntry, page_id: int):
+        """LRU命中：更新LRU顺序"""
+        self.cache.move_to_end(page_id)
+    
+    def _hit_fifo(self, entry: CacheEntry, page_id: int):
+        """FIFO命中：顺序不变"""
+    
+    def _hit_lrfu(self, entry: CacheEntry, page_id: int):
+        """LRFU命中：更新访问时间和分数"""
+        entry.access_time = time.monotonic_ns()
+        entry.score = self.decay * entry.score + 1
+        self._push_lrfu(page_id, entry.score)
     
     def put_page(self, page_id: int, page: Page, is_dirty: bool = False):
         """将页放入缓存"""
-        if page_id in self.cache:
-            # 更新现有条目
-            entry = self.cache[page_id]
-            entry.page = page
-            entry.is_dirty = is_dirty
-            entry.access_time = time.time()
-            entry.access_count += 1
-            
-            if self.policy == ReplacementPolicy.LRU:
-                self.cache.move_to_end(page_id)
-        else:
-            # 添加新条目
-            self._add_to_cache(page_id, page, is_dirty)
+        with self._meta_lock:
+            if page_id in self.cache:
+                # 更新现有条目
+                entry = self.cache[page_id]
+                entry.page = page
+                entry.is_dirty = is_dirty
+                if is_dirty:
+                    self._dirty.add(page_id)
+                else:
+                    self._dirty.discard(page_id)
+                entry.access_count += 1
+                if self._policy_id == _POLICY_LRFU:
+                    entry.access_time = time.monotonic_ns()
+                
+                if self._policy_id == _POLICY_LRU:
+                    self.cache.move_to_end(page_id)
+            else:
+                # 添加新条目
+                self._add_to_cache(page_id, page, is_dirty)
     
     def _add_to_cache(self, page_id: int, page: Page, is_dirty: bool = False):
         """添加页到缓存"""
+        # 脏页超过高水位时提前写回，避免驱逐时同步写盘
+        if len(self._dirty) > self.max_size * self.high_watermark:
+            self._writeback_until(self.max_size * self.low_watermark)
+        
         # 检查缓存是否已满
         if len(self.cache) >= self.max_size:
             self._evict_page()
         
-        # 添加新条目
-        entry = CacheEntry(
-            page=page,
-            access_time=time.time(),
-            access_count=1,
-            is_dirty=is_dirty,
-            score=1.0
-        )
+        # 添加新条目，优先复用空闲链表中的条目
+        access_time = time.monotonic_ns() if self._policy_id == _POLICY_LRFU else 0
+        if self._entry_pool:
+            entry = self._entry_pool.pop()
+            entry.page = page
+            entry.access_time = access_time
+            entry.access_count = 1
+            entry.is_dirty = is_dirty
+            entry.score = 1.0
+        else:
+            entry = CacheEntry(
+                page=page,
+                access_time=access_time,
+                access_count=1,
+                is_dirty=is_dirty,
+                score=1.0
+            )
         
         self.cache[page_id] = entry
+        if is_dirty:
+            self._dirty.add(page_id)
+        
+        if self._policy_id == _POLICY_LRFU:
+            self._push_lrfu(page_id, entry.score)
         
-        # 对于FIFO策略，新条目添加到末尾
-        if self.policy == ReplacementPolicy.FIFO:
-            self.cache.move_to_end(page_id)
+        # 新键由OrderedDict自动追加到末尾，FIFO无需额外调整顺序
 
         logger.log_cache_operation("写入", page_id=page_id, hit=False)
+    
+    def _writeback_until(self, target: float):
+        """从最旧的条目开始写回脏页，直到脏页数低于target"""
+        dirty = self._dirty
+        for page_id, entry in self.cache.items():
+            if len(dirty) < target:
+                break
+            if entry.is_dirty:
+                self._write_back(page_id, entry.page)
+                entry.is_dirty = False
+                dirty.discard(page_id)
+    
+    def _push_lrfu(self, page_id: int, score: float):
+        """记录页的最新分数，旧的堆条目随版本号失效"""
+        self._version_seq += 1
+        self._version[page_id] = self._version_seq
+        heapq.heappush(self._lrfu_heap, (score, self._version_seq, page_id))
+        
+        # 过期条目过多时重建堆
+        if len(self._lrfu_heap) > 2 * len(self.cache) + 16:
+            self._lrfu_heap = [(self.cache[pid].score, ver, pid)
+                               for pid, ver in self._version.items() if pid in self.cache]
+            heapq.heapify(self._lrfu_heap)
+    
+    def _pop_lrfu(self) -> int:
+        """弹出分数最低的有效页ID"""
+        heap = self._lrfu_heap
+        while heap:
+            _, version, page_id = heapq.heappop(heap)
+            if page_id in self.cache and self._version.get(page_id) == version:
+                del self._version[page_id]
+                return page_id
+        # 堆为空时退回线性扫描
+        return min(self.cache, key=lambda k: self.cache[k].score)
+    
     def _evict_page(self):
         """驱逐页"""
         if not self.cache:
             return
         
         # 选择要驱逐的页
-        if self.policy == ReplacementPolicy.LRU:
+        if self._policy_id == _POLICY_LRU:
             # LRU: 移除最久未使用的页
             page_id, entry = self.cache.popitem(last=False)
-        elif self.policy == ReplacementPolicy.LRFU:
+        elif self._policy_id == _POLICY_LRFU:
             # 驱逐分数最低的
-            page_id = min(self.cache, key=lambda k: self.cache[k].score)
+            page_id = self._pop_lrfu()
             entry = self.cache.pop(page_id)
         else:  # FIFO
             # FIFO: 移除最早进入的页
@@ -154,67 +276,94 @@ class CacheManager:
         
         # 如果页是脏的，写回存储
         if entry.is_dirty:
-            self.page_manager.write_page(page_id, entry.page)
+            self._write_back(page_id, entry.page)
+            self._dirty.discard(page_id)
         
         # 记录驱逐日志
         self.stats.evictions += 1
         self.eviction_log.append({
             'page_id': page_id,
             'access_count': entry.access_count,
-            'last_access': entry.access_time,
+            'last_access': entry.access_time or 0,
             'score': entry.score,
             'is_dirty': entry.is_dirty,
             'timestamp': time.time()
         })
         logger.log_cache_operation("释放", page_id=page_id, hit=True)
+        
+        # 回收条目供后续未命中复用
+        if len(self._entry_pool) < self.max_size:
+            entry.page = None
+            self._entry_pool.append(entry)
     
     def flush_page(self, page_id: int) -> bool:
         """刷新指定页到存储"""
-        if page_id not in self.cache:
-            return False
-        
-        entry = self.cache[page_id]
-        if entry.is_dirty:
-            success = self.page_manager.write_page(page_id, entry.page)
-            if success:
-                entry.is_dirty = False
-            return success
+        with self._meta_lock:
+            entry = self.cache.get(page_id)
+            if entry is None:
+                return False
+            if not entry.is_dirty:
+                return True
+            
+            # 先清除脏标记，写回在元数据锁外进行
+            page = entry.page
+            entry.is_dirty = False
+            self._dirty.discard(page_id)
         
-        return True
+        success = self._write_back(page_id, page)
+        if not success:
+            self.mark_dirty(page_id)
+        return success
     
     def flush_all(self):
-        """刷新所有脏页到存储"""
-        for page_id, entry in self.cache.items():
-            if entry.is_dirty:
-                self.page_manager.write_page(page_id, entry.page)
+        """刷新所有脏页到存储（按页ID升序写回，使写入偏移顺序递增）"""
+        with self._meta_lock:
+            cache = self.cache
+            pending = []
+            for page_id in sorted(self._dirty):
+                entry = cache[page_id]
+                pending.append((page_id, entry.page))
                 entry.is_dirty = False
+            self._dirty.clear()
+        
+        for page_id, page in pending:
+            self._write_back(page_id, page)
     
     def mark_dirty(self, page_id: int):
         """标记页为脏"""
-        if page_id in self.cache:
-            self.cache[page_id].is_dirty = True
+        with self._meta_lock:
+            entry = self.cache.get(page_id)
+            if entry is not None and not entry.is_dirty:
+                entry.is_dirty = True
+                self._dirty.add(page_id)
     
     def remove_page(self, page_id: int) -> bool:
         """从缓存中移除页"""
-        if page_id in self.cache:
-            entry = self.cache[page_id]
+        with self._meta_lock:
+            if page_id in self.cache:
+                entry = self.cache[page_id]
+                
+                # 如果是脏页，先写回
+                if entry.is_dirty:
+                    self._write_back(page_id, entry.page)
+                    self._dirty.discard(page_id)
+                
+                del self.cache[page_id]
+                self._version.pop(page_id, None)
+                return True
             
-            # 如果是脏页，先写回
-            if entry.is_dirty:
-                self.page_manager.write_page(page_id, entry.page)
-            
-            del self.cache[page_id]
-            return True
-        
-        return False
+            return False
     
     def clear_cache(self):
         """清空缓存"""
-        # 刷新所有脏页
-        self.flush_all()
-        
-        # 清空缓存
-        self.cache.clear()
+        with self._meta_lock:
+            # 刷新所有脏页
+            self.flush_all()
+            
+            # 清空缓存
+            self.cache.clear()
+            self._lrfu_heap.clear()
+            self._version.clear()
     
     def get_cache_stats(self) -> CacheStats:
         """获取缓存统计信息"""
@@ -239,33 +388,38 @@ class CacheManager:
     
     def get_eviction_log(self, limit: int = 10) -> List[Dict]:
         """获取驱逐日志"""
-        return self.eviction_log[-limit:]
+        log = self.eviction_log
+        return list(itertools.islice(log, max(0, len(log) - limit), len(log)))
     
     def print_stats(self):
         """打印缓存统计信息"""
         info = self.get_cache_info()
         stats = info['stats']
         
-        print("缓存统计信息:")
-        print(f"  最大容量: {info['max_size']}")
-        print(f"  当前大小: {info['current_size']}")
-        print(f"  替换策略: {info['policy']}")
-        print(f"  总请求数: {stats['total_requests']}")
-        print(f"  命中次数: {stats['hits']}")
-        print(f"  未命中次数: {stats['misses']}")
-        print(f"  驱逐次数: {stats['evictions']}")
-        print(f"  命中率: {stats['hit_rate']:.2%}")
-        print(f"  未命中率: {stats['miss_rate']:.2%}")
+        # 拼接后一次性输出
+        sys.stdout.write("\n".join([
+            "缓存统计信息:",
+            f"  最大容量: {info['max_size']}",
+            f"  当前大小: {info['current_size']}",
+            f"  替换策略: {info['policy']}",
+            f"  总请求数: {stats['total_requests']}",
+            f"  命中次数: {stats['hits']}",
+            f"  未命中次数: {stats['misses']}",
+            f"  驱逐次数: {stats['evictions']}",
+            f"  命中率: {stats['hit_rate']:.2%}",
+            f"  未命中率: {stats['miss_rate']:.2%}",
+        ]) + "\n")
     
     def print_eviction_log(self, limit: int = 5):
         """打印驱逐日志"""
         log = self.get_eviction_log(limit)
         
-        print(f"\n最近{len(log)}次驱逐记录:")
+        lines = [f"\n最近{len(log)}次驱逐记录:"]
         for entry in log:
-            print(f"  页{entry['page_id']}: 访问{entry['access_count']}次, "
-                  f"最后访问{entry['last_access']:.2f}, "
-                  f"脏页={entry['is_dirty']}")
+            lines.append(f"  页{entry['page_id']}: 访问{entry['access_count']}次, "
+                         f"最后访问{entry['last_access']:.2f}, "
+                         f"脏页={entry['is_dirty']}")
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
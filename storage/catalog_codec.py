@@ -0,0 +1,109 @@
+"""
+系统目录列信息编码
+column_info 以定长二进制描述符存储，取代 JSON 文本：
+    [魔数(1字节)] [列数(1字节)] + 每列 [名称长度(1字节)] [名称] [类型码(1字节)] [标志(1字节)]
+旧版 JSON 行通过首字节识别，仍可读取。
+"""
+import json
+import struct
+from typing import Any, Dict, List, Optional, Union
+
+from storage.storage_engine import ColumnInfo, DataType
+
+CATALOG_MAGIC = 0xC1
+
+_BYTE = struct.Struct(">B")
+_HEADER = struct.Struct(">BB")       # 魔数, 列数
+_COLUMN_TAIL = struct.Struct(">BB")  # 类型码, 标志
+
+_FLAG_NULLABLE = 0x01
+
+_TYPE_CODES = {DataType.INT: 1, DataType.VARCHAR: 2}
+_CODE_TYPES = {code: data_type for data_type, code in _TYPE_CODES.items()}
+
+ColumnLike = Union[ColumnInfo, Dict[str, Any]]
+
+
+def _as_column_info(column: ColumnLike) -> Optional[ColumnInfo]:
+    """将目录中的列字典统一转换为ColumnInfo，无法表示时返回None"""
+    if isinstance(column, ColumnInfo):
+        return column
+    if set(column) - {'name', 'type'}:
+        return None
+    try:
+        return ColumnInfo(name=column['name'], data_type=DataType(column['type']))
+    except (KeyError, ValueError):
+        return None
+
+
+def pack_columns(columns: List[ColumnLike]) -> Optional[bytes]:
+    """编码列信息，超出描述符表示范围时返回None"""
+    if len(columns) > 0xFF:
+        return None
+
+    parts = [_HEADER.pack(CATALOG_MAGIC, len(columns))]
+    for column in columns:
+        col = _as_column_info(column)
+        if col is None or col.data_type not in _TYPE_CODES:
+            return None
+        name = col.name.encode('utf-8')
+        if len(name) > 0xFF:
+            return None
+        parts.append(_BYTE.pack(len(name)))
+        parts.append(name)
+        parts.append(_COLUMN_TAIL.pack(_TYPE_CODES[col.data_type],
+                                       _FLAG_NULLABLE if col.nullable else 0))
+    return b"".join(parts)
+
+
+def unpack_columns(data: bytes) -> List[ColumnInfo]:
+    """解码列信息描述符"""
+    magic, count = _HEADER.unpack_from(data, 0)
+    if magic != CATALOG_MAGIC:
+        raise ValueError(f"列信息魔数错误: {magic:#x}")
+
+    offset = _HEADER.size
+    columns = []
+    for _ in range(count):
+        name_len = data[offset]
+        offset += 1
+        name = bytes(data[offset:offset + name_len]).decode('utf-8')
+        offset += name_len
+        type_code, flags = _COLUMN_TAIL.unpack_from(data, offset)
+        offset += _COLUMN_TAIL.size
+        data_type = _CODE_TYPES.get(type_code)
+        if data_type is None:
+            raise ValueError(f"未知的列类型码: {type_code}")
+        columns.append(ColumnInfo(name, data_type, bool(flags & _FLAG_NULLABLE)))
+    return columns
+
+
+def encode_column_info(columns: List[ColumnLike]) -> str:
+    """编码为可存入VARCHAR列的文本，无法用描述符表示时退回JSON"""
+    packed = pack_columns(columns)
+    if packed is None:
+        return json.dumps([column if isinstance(column, dict)
+                           else {'name': column.name, 'type': column.data_type.value}
+                           for column in columns])
+    # latin-1 保证每个字节与一个字符一一对应，往返无损
+    return packed.decode('latin-1')
+
+
+def _is_packed(text: str) -> bool:
+    return bool(text) and ord(text[0]) == CATALOG_MAGIC
+
+
+def decode_column_info(text: str) -> List[ColumnInfo]:
+    """解码column_info列，兼容旧版JSON格式"""
+    if _is_packed(text):
+        return unpack_columns(text.encode('latin-1'))
+    return [ColumnInfo(name=col['name'], data_type=DataType(col['type']))
+            for col in json.loads(text)]
+
+
+def decode_column_dicts(text: str) -> List[Dict[str, Any]]:
+    """解码为目录使用的列字典格式，旧版JSON行原样返回"""
+    if _is_packed(text):
+        return [{'name': col.name, 'type': col.data_type.value}
+                for col in unpack_columns(text.encode('latin-1'))]
+    return json.loads(text)
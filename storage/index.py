@@ -5,11 +5,43 @@
 """
 import struct
 import pickle
-from typing import Any, List, Optional, Dict, Tuple
+import sys
+from typing import Any, Iterable, List, Optional, Dict, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from collections import defaultdict
-import bisect
+from operator import itemgetter
+from bisect import bisect_left as _bisect_left, bisect_right as _bisect_right
+
+
+_SENTINEL = object()
+
+# 哈希索引中记录位置(page_id, offset)打包为一个整数：高位为页ID，低32位为页内偏移
+_OFFSET_BITS = 32
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def _pack_location(page_id: int, offset: int) -> int:
+    """将记录位置打包为单个整数"""
+    return (page_id << _OFFSET_BITS) | offset
+
+
+def _unpack_location(location: int) -> Tuple[int, int]:
+    """将打包的记录位置还原为(page_id, offset)"""
+    return location >> _OFFSET_BITS, location & _OFFSET_MASK
+
+
+def _even_ranges(n: int, capacity: int) -> List[Tuple[int, int]]:
+    """把n个元素均匀切分为若干段，每段不超过capacity个，返回各段的[lo, hi)"""
+    groups = -(-n // capacity)
+    base, extra = divmod(n, groups)
+    ranges = []
+    lo = 0
+    for i in range(groups):
+        hi = lo + base + (i < extra)
+        ranges.append((lo, hi))
+        lo = hi
+    return ranges
 
 
 class IndexType(Enum):
@@ -31,7 +63,9 @@ class IndexEntry:
 class BPlusTreeNode:
     """B+树节点"""
     
-    def __init__(self, is_leaf: bool = False, max_keys: int = 3):
+    __slots__ = ('is_leaf', 'max_keys', 'keys', 'values', 'next_leaf', 'parent')
+    
+    def __init__(self, is_leaf: bool = False, max_keys: int = 64):
         self.is_leaf = is_leaf
         self.max_keys = max_keys
         self.keys: List[Any] = []
@@ -54,13 +88,13 @@ class BPlusTreeNode:
         """插入键值对"""
         if self.is_leaf:
             # 叶子节点插入
-            pos = bisect.bisect_left(self.keys, key)
+            pos = _bisect_left(self.keys, key)
             self.keys.insert(pos, key)
             self.values.insert(pos, value)
             return len(self.keys) > self.max_keys
         else:
             # 内部节点插入
-            pos = bisect.bisect_right(self.keys, key)
+            pos = _bisect_right(self.keys, key)
             child = self.values[pos]
             if child.insert_key(key, value):
                 # 子节点分裂
@@ -72,56 +106,49 @@ class BPlusTreeNode:
         child = self.values[pos]
         mid = len(child.keys) // 2
         
-        # 创建新节点
-        new_child = BPlusTreeNode(child.is_leaf, child.max_keys)
-        new_child.keys = child.keys[mid:]
-        new_child.values = child.values[mid:]
+        new_child, promote_key = child.split(mid)
         new_child.parent = self
         
-        # 更新原节点
-        child.keys = child.keys[:mid]
-        child.values = child.values[:mid]
-        
-        # 更新叶子节点链接
-        if child.is_leaf:
-            new_child.next_leaf = child.next_leaf
-            child.next_leaf = new_child
-        
         # 将中间键提升到父节点
-        promote_key = new_child.keys[0]
         self.keys.insert(pos, promote_key)
         self.values.insert(pos + 1, new_child)
         
         return len(self.keys) > self.max_keys
     
-    def search(self, key: Any) -> Optional[Any]:
-        """搜索键"""
-        if self.is_leaf:
-            pos = bisect.bisect_left(self.keys, key)
-            if pos < len(self.keys) and self.keys[pos] == key:
-                return self.values[pos]
-            return None
-        else:
-            pos = bisect.bisect_right(self.keys, key)
-            return self.values[pos].search(key)
-    
-    def range_search(self, start_key: Any, end_key: Any) -> List[Any]:
-        """范围搜索"""
+    def split(self, mid: int) -> Tuple['BPlusTreeNode', Any]:
+        """在mid处分裂节点，返回新的右兄弟节点和需要提升的键
+        
+        叶子节点的右半部分保留分隔键；内部节点的分隔键上移，不再保留在子节点中。
+        """
+        new_node = BPlusTreeNode(self.is_leaf, self.max_keys)
         if self.is_leaf:
-            result = []
-            for i, key in enumerate(self.keys):
-                if start_key <= key <= end_key:
-                    result.append(self.values[i])
-            return result
+            new_node.keys = self.keys[mid:]
+            new_node.values = self.values[mid:]
+            promote_key = new_node.keys[0]
+            self.keys = self.keys[:mid]
+            self.values = self.values[:mid]
+            
+            # 更新叶子节点链接
+            new_node.next_leaf = self.next_leaf
+            self.next_leaf = new_node
         else:
-            pos = bisect.bisect_right(self.keys, start_key)
-            return self.values[pos].range_search(start_key, end_key)
+            promote_key = self.keys[mid]
+            new_node.keys = self.keys[mid + 1:]
+            new_node.values = self.values[mid + 1:]
+            self.keys = self.keys[:mid]
+            self.values = self.values[:mid + 1]
+            for child in new_node.values:
+                child.parent = new_node
+        return new_node, promote_key
 
 
 class BPlusTreeIndex:
-    """B+树索引"""
+    """B+树索引
+    
+    默认每个节点最多64个键：树高更低，节点内插入的列表搬移开销仍然很小。
+    """
     
-    def __init__(self, max_keys: int = 3):
+    def __init__(self, max_keys: int = 64):
         self.max_keys = max_keys
         self.root: Optional[BPlusTreeNode] = None
         self.size = 0
@@ -140,37 +167,114 @@ class BPlusTreeIndex:
             new_root = BPlusTreeNode(is_leaf=False, max_keys=self.max_keys)
             mid = len(self.root.keys) // 2
             
-            # 创建新的右子树
-            right_child = BPlusTreeNode(self.root.is_leaf, self.max_keys)
-            right_child.keys = self.root.keys[mid:]
-            right_child.values = self.root.values[mid:]
-            right_child.parent = new_root
-            
-            # 更新左子树
             left_child = self.root
-            left_child.keys = left_child.keys[:mid]
-            left_child.values = left_child.values[:mid]
+            right_child, promote_key = left_child.split(mid)
             left_child.parent = new_root
+            right_child.parent = new_root
             
             # 设置新根
-            new_root.keys = [right_child.keys[0]]
+            new_root.keys = [promote_key]
             new_root.values = [left_child, right_child]
             self.root = new_root
         
         self.size += 1
         return True
     
+    def bulk_load(self, items: List[Tuple[Any, Any]]):
+        """由按键有序的(键, 值)列表自底向上批量构建整棵树，省去逐条插入的下降和分裂
+        
+        树非空时退化为逐条插入。
+        """
+        if self.root is not None:
+            for key, value in items:
+                self.insert(key, value)
+            return
+        if not items:
+            return
+        
+        max_keys = self.max_keys
+        # 叶子层：均匀装满，串成链表
+        level = []
+        for lo, hi in _even_ranges(len(items), max_keys):
+            leaf = BPlusTreeNode(is_leaf=True, max_keys=max_keys)
+            chunk = items[lo:hi]
+            leaf.keys = [key for key, _ in chunk]
+            leaf.values = [value for _, value in chunk]
+            if level:
+                level[-1].next_leaf = leaf
+            level.append(leaf)
+        mins = [leaf.keys[0] for leaf in level]
+        
+        # 逐层向上：分隔键取右侧子树的最小键，与叶子分裂时提升的键一致
+        while len(level) > 1:
+            parents = []
+            parent_mins = []
+            for lo, hi in _even_ranges(len(level), max_keys + 1):
+                node = BPlusTreeNode(is_leaf=False, max_keys=max_keys)
+                node.values = level[lo:hi]
+                node.keys = mins[lo + 1:hi]
+                for child in node.values:
+                    child.parent = node
+                parents.append(node)
+                parent_mins.append(mins[lo])
+            level, mins = parents, parent_mins
+        
+        self.root = level[0]
+        self.size = len(items)
+    
+    def _find_leaf(self, key: Any) -> BPlusTreeNode:
+        """从根节点迭代下降到key所在的叶子节点"""
+        node = self.root
+        bisect_right = _bisect_right
+        while not node.is_leaf:
+            node = node.values[bisect_right(node.keys, key)]
+        return node
+    
+    def _find_leaf_lower(self, key: Any) -> BPlusTreeNode:
+        """下降到可能含有key的最左叶子节点（重复键可能跨越分隔键两侧）"""
+        node = self.root
+        bisect_left = _bisect_left
+        while not node.is_leaf:
+            node = node.values[bisect_left(node.keys, key)]
+        return node
+    
     def search(self, key: Any) -> Optional[Any]:
         """搜索键"""
         if self.root is None:
             return None
-        return self.root.search(key)
+        leaf = self._find_leaf(key)
+        keys = leaf.keys
+        pos = _bisect_left(keys, key)
+        if pos < len(keys) and keys[pos] == key:
+            return leaf.values[pos]
+        return None
     
     def range_search(self, start_key: Any, end_key: Any) -> List[Any]:
-        """范围搜索"""
+        """范围搜索：定位起始叶子后沿next_leaf链表顺序扫描
+        
+        start_key/end_key为None时表示该侧不设边界。
+        """
         if self.root is None:
             return []
-        return self.root.range_search(start_key, end_key)
+        result = []
+        if start_key is None:
+            leaf = self.root
+            while not leaf.is_leaf:
+                leaf = leaf.values[0]
+            pos = 0
+        else:
+            leaf = self._find_leaf_lower(start_key)
+            pos = _bisect_left(leaf.keys, start_key)
+        while leaf is not None:
+            keys = leaf.keys
+            values = leaf.values
+            for i in range(pos, len(keys)):
+                if end_key is not None and keys[i] > end_key:
+                    return result
+                result.append(values[i])
+            leaf = leaf.next_leaf
+            pos = 0
+        return result
     
     def delete(self, key: Any) -> bool:
         """删除键"""
@@ -180,69 +284,38 @@ class BPlusTreeIndex:
 
 
 class HashIndex:
-    """哈希索引"""
-    
-    def __init__(self, initial_size: int = 16):
-        self.size = initial_size
-        self.buckets: List[List[Tuple[Any, Any]]] = [[] for _ in range(initial_size)]
-        self.count = 0
-        self.load_factor = 0.75
-    
-    def _hash(self, key: Any) -> int:
-        """计算哈希值"""
-        return hash(key) % self.size
-    
-    def _resize(self):
-        """调整哈希表大小"""
-        old_buckets = self.buckets
-        self.size *= 2
-        self.buckets = [[] for _ in range(self.size)]
-        self.count = 0
-        
-        for bucket in old_buckets:
-            for key, value in bucket:
-                self.insert(key, value)
+    """哈希索引（基于内置dict）"""
+    
+    def __init__(self):
+        # dict的每个槽位已保存键的哈希值，探测时先比较哈希再比较键
+        self._map: Dict[Any, Any] = {}
     
     def insert(self, key: Any, value: Any) -> bool:
-        """插入键值对"""
-        if self.count >= self.size * self.load_factor:
-            self._resize()
-        
-        bucket_index = self._hash(key)
-        bucket = self.buckets[bucket_index]
-        
-        # 检查是否已存在
-        for i, (k, v) in enumerate(bucket):
-            if k == key:
-                bucket[i] = (key, value)
-                return True
-        
-        # 插入新键值对
-        bucket.append((key, value))
-        self.count += 1
+        """插入键值对，已存在的键会被覆盖"""
+        self._map[key] = value
         return True
     
     def search(self, key: Any) -> Optional[Any]:
         """搜索键"""
-        bucket_index = self._hash(key)
-        bucket = self.buckets[bucket_index]
-        
-        for k, v in bucket:
-            if k == key:
-                return v
-        return None
+        return self._map.get(key)
     
     def delete(self, key: Any) -> bool:
         """删除键"""
-        bucket_index = self._hash(key)
-        bucket = self.buckets[bucket_index]
-        
-        for i, (k, v) in enumerate(bucket):
-            if k == key:
-                del bucket[i]
-                self.count -= 1
-                return True
-        return False
+        return self._map.pop(key, _SENTINEL) is not _SENTINEL
+    
+    def bulk_load(self, items: Iterable[Tuple[Any, Any]]):
+        """批量插入(键, 值)，语义同逐条insert：重复键以后出现的为准"""
+        self._map.update(items)
+
+
+# 运算符 -> (是否以值为下界, 是否以值为上界)；开区间由调用方再按条件过滤
+_LOOKUP_BOUNDS = {
+    '=': (True, True),
+    '>': (True, False),
+    '>=': (True, False),
+    '<': (False, True),
+    '<=': (False, True),
+}
 
 
 class IndexManager:
@@ -251,10 +324,15 @@ class IndexManager:
     def __init__(self):
         self.indexes: Dict[str, Dict[str, Any]] = {}  # table_name -> {column_name -> index}
         self.index_metadata: Dict[str, Dict[str, Any]] = {}
+        # (table_name, column_name) -> index，记录级操作只需一次查找
+        self._flat: Dict[Tuple[str, str], Any] = {}
     
     def create_index(self, table_name: str, column_name: str, 
                     index_type: IndexType = IndexType.BPLUS_TREE) -> bool:
         """创建索引"""
+        # 驻留表名和列名，之后的查找可以走字典的指针比较快速路径
+        table_name = sys.intern(table_name)
+        column_name = sys.intern(column_name)
         index_key = f"{table_name}.{column_name}"
         
         if index_type == IndexType.BPLUS_TREE:
@@ -264,10 +342,8 @@ class IndexManager:
         else:
             return False
         
-        if table_name not in self.indexes:
-            self.indexes[table_name] = {}
-        
-        self.indexes[table_name][column_name] = index
+        self.indexes.setdefault(table_name, {})[column_name] = index
+        self._flat[(table_name, column_name)] = index
         self.index_metadata[index_key] = {
             "type": index_type.value,
             "created_at": "2024-01-01",  # 简化实现
@@ -281,6 +357,7 @@ class IndexManager:
         """删除索引"""
         if table_name in self.indexes and column_name in self.indexes[table_name]:
             del self.indexes[table_name][column_name]
+            del self._flat[(table_name, column_name)]
             index_key = f"{table_name}.{column_name}"
             if index_key in self.index_metadata:
                 del self.index_metadata[index_key]
@@ -290,29 +367,68 @@ class IndexManager:
     def insert_record(self, table_name: str, column_name: str, 
                      key: Any, page_id: int, offset: int) -> bool:
         """向索引插入记录"""
-        if table_name in self.indexes and column_name in self.indexes[table_name]:
-            index = self.indexes[table_name][column_name]
-            return index.insert(key, (page_id, offset))
-        return False
+        index = self._flat.get((table_name, column_name))
+        if index is None:
+            return False
+        if isinstance(index, HashIndex):
+            # 哈希索引只做点查，位置打包存储以省去每条记录的元组
+            return index.insert(key, _pack_location(page_id, offset))
+        return index.insert(key, (page_id, offset))
+    
+    def bulk_load(self, table_name: str, column_name: str,
+                  entries: List[Tuple[Any, Tuple[int, int]]]) -> bool:
+        """批量装入(键, (page_id, offset))条目，entries按扫描顺序给出，会被原地排序"""
+        index = self._flat.get((table_name, column_name))
+        if index is None:
+            return False
+        if isinstance(index, HashIndex):
+            index.bulk_load((key, _pack_location(page_id, offset))
+                            for key, (page_id, offset) in entries)
+            return True
+        # 稳定排序：重复键保持扫描顺序
+        entries.sort(key=itemgetter(0))
+        index.bulk_load(entries)
+        return True
     
     def search_record(self, table_name: str, column_name: str, key: Any) -> Optional[Tuple[int, int]]:
         """在索引中搜索记录"""
-        if table_name in self.indexes and column_name in self.indexes[table_name]:
-            index = self.indexes[table_name][column_name]
-            result = index.search(key)
-            if result:
-                return result
+        index = self._flat.get((table_name, column_name))
+        if index is None:
+            return None
+        result = index.search(key)
+        if result is not None and isinstance(index, HashIndex):
+            return _unpack_location(result)
+        if result:
+            return result
         return None
     
     def range_search(self, table_name: str, column_name: str, 
                     start_key: Any, end_key: Any) -> List[Tuple[int, int]]:
         """范围搜索"""
-        if table_name in self.indexes and column_name in self.indexes[table_name]:
-            index = self.indexes[table_name][column_name]
-            if hasattr(index, 'range_search'):
-                return index.range_search(start_key, end_key)
+        index = self._flat.get((table_name, column_name))
+        if index is not None and hasattr(index, 'range_search'):
+            return index.range_search(start_key, end_key)
         return []
     
+    def lookup(self, table_name: str, column_name: str,
+               operator: str, value: Any) -> Optional[List[Tuple[int, int]]]:
+        """按条件探测索引，返回候选记录位置（可能包含已失效的位置）
+        
+        只有B+树索引能返回重复键的全部位置；没有可用索引或运算符不支持时返回None。
+        """
+        index = self._flat.get((table_name, column_name))
+        if not isinstance(index, BPlusTreeIndex):
+            return None
+        bounds = _LOOKUP_BOUNDS.get(operator)
+        if bounds is None:
+            return None
+        low, high = bounds
+        return index.range_search(value if low else None, value if high else None)
+    
+    def indexed_columns(self, table_name: str) -> List[str]:
+        """表上建有索引的列名（副本，遍历时可以增删索引）"""
+        return list(self.indexes.get(table_name, ()))
+    
     def get_index_info(self, table_name: str) -> Dict[str, Any]:
         """获取表的索引信息"""
         if table_name in self.indexes:
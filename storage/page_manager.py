@@ -3,11 +3,51 @@
 实现页的分配、释放、读写操作
 每页大小固定为4KB，页编号唯一
 """
+import mmap
 import os
 import struct
+from functools import lru_cache
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from utils.logger import logger
+
+
+# 页头格式：大端序，I=int, 32s=32字节字符串, i=int；预编译避免每次解析格式串
+# 32s字段打包时自动以\x00补齐或截断，无需预先ljust
+_PAGE_HEADER = struct.Struct(">I32s32sIIi")
+
+
+# 页大小与页头大小（与Page.PAGE_SIZE/Page.HEADER_SIZE一致，热路径中直接引用模块常量）
+_PAGE_SIZE = 4096
+_HEADER_SIZE = 80
+# 文件头中页数字段：偏移8处的8字节小端无符号整数
+_FILE_HEADER_COUNT = struct.Struct("<Q")
+_FILE_HEADER_COUNT_OFFSET = 8
+# 预绑定的页头打包/解包方法
+_pack_header = _PAGE_HEADER.pack
+_pack_header_into = _PAGE_HEADER.pack_into
+_unpack_header_from = _PAGE_HEADER.unpack_from
+
+
+@lru_cache(maxsize=1024)
+def _encode_field(value: str) -> bytes:
+    """页头字符串字段的UTF-8编码（页类型和表名取值很少，结果缓存复用）"""
+    return value.encode('utf-8')
+
+
+# 单次pwritev的最大缓冲区数（Linux IOV_MAX）
+_MAX_IOV = 1024
+# 启动扫描空闲页时每次读取的页数
+_SCAN_CHUNK_PAGES = 256
+# 批量读页时的预读提示（平台不支持时为None）
+_MADV_WILLNEED = getattr(mmap, "MADV_WILLNEED", None)
+# 页头中page_type字段的位置及空闲页的取值
+_PAGE_TYPE_SLICE = slice(4, 36)
+_FREE_PAGE_TYPE = b"free".ljust(32, b"\x00")
+# 页头中table_name字段的位置
+_TABLE_NAME_SLICE = slice(36, 68)
 
 
 class PageState(Enum):
@@ -31,8 +71,8 @@ class PageHeader:
 class Page:
     """页类，表示一个4KB的存储页"""
     
-    PAGE_SIZE = 4096  # 4KB
-    HEADER_SIZE = 80  # 页头大小 (4+32+32+4+4+4=80字节)
+    PAGE_SIZE = _PAGE_SIZE  # 4KB
+    HEADER_SIZE = _HEADER_SIZE  # 页头大小 (4+32+32+4+4+4=80字节)
     
     def __init__(self, page_id: int):
         self.page_id = page_id
@@ -41,53 +81,90 @@ class Page:
             page_type="free",
             table_name="",
             record_count=0,
-            free_space=Page.PAGE_SIZE - Page.HEADER_SIZE,
+            free_space=_PAGE_SIZE - _HEADER_SIZE,
             next_page=-1
         )
-        self.data = bytearray(Page.PAGE_SIZE)
+        self.data = bytearray(_PAGE_SIZE)
         self.is_dirty = False
         self.state = PageState.FREE
+        # 最近一次写入缓冲区的页头字段及对应的缓冲区，未变化时跳过重新打包
+        self._packed_fields = None
+        self._packed_data = None
+    
+    def _header_fields(self) -> Tuple:
+        """页头字段元组"""
+        header = self.header
+        return (header.page_id, header.page_type, header.table_name,
+                header.record_count, header.free_space, header.next_page)
     
     def serialize_header(self) -> bytes:
         """序列化页头"""
-        return struct.pack(
-            ">I32s32sIIi",  # 大端序，I=int, 32s=32字节字符串, i=int
-            self.header.page_id,
-            self.header.page_type.encode('utf-8').ljust(32, b'\x00'),
-            self.header.table_name.encode('utf-8').ljust(32, b'\x00'),
-            self.header.record_count,
-            self.header.free_space,
-            self.header.next_page
+        header = self.header
+        return _pack_header(
+            header.page_id,
+            _encode_field(header.page_type),
+            _encode_field(header.table_name),
+            header.record_count,
+            header.free_space,
+            header.next_page
+        )
+    
+    def pack_header(self):
+        """将页头直接写入页数据缓冲区开头（页头和缓冲区都未变化时跳过）"""
+        fields = self._header_fields()
+        if fields == self._packed_fields and self._packed_data is self.data:
+            return
+        
+        header = self.header
+        _pack_header_into(
+            self.data, 0,
+            header.page_id,
+            _encode_field(header.page_type),
+            _encode_field(header.table_name),
+            header.record_count,
+            header.free_space,
+            header.next_page
         )
+        self._packed_fields = fields
+        self._packed_data = self.data
     
     def deserialize_header(self, data: bytes):
         """反序列化页头"""
-        if len(data) < Page.HEADER_SIZE:
+        if len(data) < _HEADER_SIZE:
             raise ValueError("页头数据不足")
         
-        unpacked = struct.unpack(">I32s32sIIi", data[:Page.HEADER_SIZE])
-        self.header.page_id = unpacked[0]
-        self.header.page_type = unpacked[1].decode('utf-8').rstrip('\x00')
-        self.header.table_name = unpacked[2].decode('utf-8').rstrip('\x00')
-        self.header.record_count = unpacked[3]
-        self.header.free_space = unpacked[4]
-        self.header.next_page = unpacked[5]
+        header = self.header
+        (header.page_id, page_type, table_name, header.record_count,
+         header.free_space, header.next_page) = _unpack_header_from(data)
+        header.page_type = page_type.decode('utf-8').rstrip('\x00')
+        header.table_name = table_name.decode('utf-8').rstrip('\x00')
     
     def write_data(self, offset: int, data: bytes) -> bool:
         """向页中写入数据"""
-        if offset + len(data) > Page.PAGE_SIZE:
+        end = offset + len(data)
+        if end > _PAGE_SIZE:
             return False
         
-        self.data[offset:offset + len(data)] = data
+        self.data[offset:end] = data
         self.is_dirty = True
         return True
     
     def read_data(self, offset: int, length: int) -> bytes:
         """从页中读取数据"""
-        if offset + length > Page.PAGE_SIZE:
+        end = offset + length
+        if end > _PAGE_SIZE:
             return b''
         
-        return bytes(self.data[offset:offset + length])
+        # 经memoryview切片只做一次复制
+        return bytes(memoryview(self.data)[offset:end])
+    
+    def read_view(self, offset: int, length: int) -> memoryview:
+        """返回页中数据的只读视图（不复制），视图在页数据被替换前有效"""
+        end = offset + length
+        if end > _PAGE_SIZE:
+            return memoryview(b'')
+        
+        return memoryview(self.data)[offset:end].toreadonly()
     
     def get_free_space(self) -> int:
         """获取可用空间"""
@@ -95,43 +172,101 @@ class Page:
     
     def allocate_space(self, size: int) -> Optional[int]:
         """分配空间，返回偏移量"""
-        if size > self.header.free_space:
+        header = self.header
+        if size > header.free_space:
             return None
         
-        offset = Page.PAGE_SIZE - self.header.free_space
-        self.header.free_space -= size
-        self.header.record_count += 1
+        offset = _PAGE_SIZE - header.free_space
+        header.free_space -= size
+        header.record_count += 1
         self.is_dirty = True
         
         return offset
     
     def to_bytes(self) -> bytes:
         """将页转换为字节数组"""
-        header_bytes = self.serialize_header()
-        self.data[:Page.HEADER_SIZE] = header_bytes
+        self.pack_header()
         return bytes(self.data)
     
     def from_bytes(self, data: bytes):
         """从字节数组加载页"""
-        if len(data) != Page.PAGE_SIZE:
-            raise ValueError(f"页大小错误: 期望{Page.PAGE_SIZE}字节，实际{len(data)}字节")
+        if len(data) != _PAGE_SIZE:
+            raise ValueError(f"页大小错误: 期望{_PAGE_SIZE}字节，实际{len(data)}字节")
         
-        self.data = bytearray(data)
+        # 复制到已有的页缓冲区，不重新分配
+        self.data[:] = data
         self.deserialize_header(data)
+        # 缓冲区中的页头与刚解析出的字段一致
+        self._packed_fields = self._header_fields()
+        self._packed_data = self.data
 
 
 class PageManager:
     """页管理器"""
     
-    def __init__(self, data_file: str = "database.dat"):
+    def __init__(self, data_file: str = "database.dat", max_cached_pages: int = 1024,
+                 write_back_size: int = 256):
         self.data_file = data_file
-        self.pages: Dict[int, Page] = {}
-        self.free_pages: List[int] = []
+        # 按需加载的页对象缓存（LRU），超出容量时淘汰最久未访问的页
+        self.pages: OrderedDict[int, Page] = OrderedDict()
+        self.max_cached_pages = max_cached_pages
+        # 空闲页位图：第page_id位为1表示该页空闲
+        self._free_bitmap = bytearray()
+        self._free_count = 0
         self.next_page_id = 0
+        # 持久打开的数据文件（无缓冲），避免每次读写都重新打开
+        self._file = None
+        # 只读内存映射，用于缺页时直接从映射复制页数据；文件增长后按需重新映射
+        self._mmap: Optional[mmap.mmap] = None
+        self._mmap_size = 0
+        # 写回缓冲：page_id -> 待写页，攒满或刷新时批量写盘
+        self._pending: Dict[int, Page] = {}
+        self.write_back_size = write_back_size
+        # 表名 -> 页ID列表，启动扫描页头时顺带建立，分配/释放页时维护
+        self._table_pages: Optional[Dict[str, List[int]]] = None
         
         # 初始化或加载数据文件
         self._initialize_storage()
     
+    def _get_file(self):
+        """获取数据文件句柄，未打开时打开（文件不存在则创建）"""
+        if self._file is None:
+            mode = 'r+b' if os.path.exists(self.data_file) else 'w+b'
+            self._file = open(self.data_file, mode, buffering=0)
+        return self._file
+    
+    def _get_mmap(self, end: int) -> Optional[mmap.mmap]:
+        """获取至少覆盖到end字节的只读映射，文件长度不足时返回None"""
+        if self._mmap is not None and self._mmap_size >= end:
+            return self._mmap
+        
+        f = self._get_file()
+        size = os.fstat(f.fileno()).st_size
+        if size < end:
+            return None
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._mmap_size = size
+        return self._mmap
+    
+    def close(self):
+        """写出缓冲中的页并关闭数据文件句柄"""
+        self.drain_write_back()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mmap_size = 0
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     def _initialize_storage(self):
         """初始化存储系统"""
         if os.path.exists(self.data_file):
@@ -145,130 +280,299 @@ class PageManager:
         meta_page = Page(0)
         meta_page.header.page_type = "meta"
         meta_page.header.record_count = 0
-        meta_page.header.free_space = Page.PAGE_SIZE - Page.HEADER_SIZE
-        self.pages[0] = meta_page
+        meta_page.header.free_space = _PAGE_SIZE - _HEADER_SIZE
+        self._cache_page(meta_page)
         self.next_page_id = 1
+        self._table_pages = {}
         
-        # 写入文件
+        # 写入文件（新文件立即落盘，保证文件头存在）
         self._write_page_to_file(meta_page)
+        self.drain_write_back()
     
     def _load_from_file(self):
         """从文件加载页信息"""
         try:
+            # 启动时只扫描页头确定空闲页，页对象在首次读取时才创建
+            page_size = _PAGE_SIZE
+            page_count = 0
+            table_pages: Dict[str, List[int]] = {}
             with open(self.data_file, 'rb') as f:
-                # 读取元数据页
-                meta_data = f.read(Page.PAGE_SIZE)
-                if len(meta_data) == Page.PAGE_SIZE:
-                    meta_page = Page(0)
-                    meta_page.from_bytes(meta_data)
-                    self.pages[0] = meta_page
-                    self.next_page_id = 1
-                
-                # 读取其他页
-                page_id = 1
                 while True:
-                    page_data = f.read(Page.PAGE_SIZE)
-                    if len(page_data) == 0:
+                    chunk = f.read(page_size * _SCAN_CHUNK_PAGES)
+                    full_pages = len(chunk) // page_size
+                    for i in range(full_pages):
+                        page_id = page_count + i
+                        # 第0页为元数据页
+                        header = chunk[i * page_size:i * page_size + _HEADER_SIZE]
+                        if page_id == 0:
+                            continue
+                        if header[_PAGE_TYPE_SLICE] == _FREE_PAGE_TYPE:
+                            self._mark_free(page_id)
+                            continue
+                        table_name = header[_TABLE_NAME_SLICE].rstrip(b"\x00")
+                        if table_name:
+                            table_pages.setdefault(table_name, []).append(page_id)
+                    page_count += full_pages
+                    if full_pages < _SCAN_CHUNK_PAGES:
                         break
-                    if len(page_data) == Page.PAGE_SIZE:
-                        page = Page(page_id)
-                        page.from_bytes(page_data)
-                        self.pages[page_id] = page
-                        
-                        if page.header.page_type == "free":
-                            self.free_pages.append(page_id)
-                        
-                        page_id += 1
-                
-                self.next_page_id = page_id
+            
+            self.next_page_id = max(page_count, 1)
+            self._table_pages = {name.decode('utf-8', 'replace'): ids
+                                 for name, ids in table_pages.items()}
         except Exception as e:
-            print(f"加载数据文件失败: {e}")
+            logger.error(f"加载数据文件失败: {e}", data_file=self.data_file)
             self._create_new_file()
     
+    def _cache_page(self, page: Page):
+        """将页对象放入缓存，超出容量时淘汰最久未访问的页（脏页先写回）"""
+        pages = self.pages
+        pages[page.page_id] = page
+        pages.move_to_end(page.page_id)
+        while len(pages) > self.max_cached_pages:
+            _, victim = pages.popitem(last=False)
+            if victim.is_dirty:
+                self._write_page_to_file(victim)
+                victim.is_dirty = False
+    
     def _write_page_to_file(self, page: Page):
-        """将页写入文件"""
-        try:
-            with open(self.data_file, 'r+b') as f:
-                f.seek(page.page_id * Page.PAGE_SIZE)
-                f.write(page.to_bytes())
-        except FileNotFoundError:
-            # 文件不存在，创建新文件
-            with open(self.data_file, 'wb') as f:
-                f.write(page.to_bytes())
-    
-    def allocate_page(self, page_type: str = "data", table_name: str = "") -> int:
-        """分配新页"""
-        page_id = self.next_page_id
+        """将页放入写回缓冲，缓冲满时批量写盘"""
+        self._pending[page.page_id] = page
+        if len(self._pending) >= self.write_back_size:
+            self.drain_write_back()
+    
+    def drain_write_back(self):
+        """将写回缓冲中的页和缓存中的脏页一次写入文件"""
+        pending = self._pending
+        for page in self.pages.values():
+            if page.is_dirty:
+                pending[page.page_id] = page
+        if not pending:
+            return
+        pages = sorted(pending.values(), key=lambda page: page.page_id)
+        pending.clear()
+        self._write_pages_batched(pages)
+        for page in pages:
+            page.is_dirty = False
+    
+    def _write_pages_batched(self, pages: List[Page]):
+        """按页ID有序地批量写页：文件只打开一次，连续页合并为一次写入"""
+        for page in pages:
+            page.pack_header()
+        
+        # 划分页ID连续的段
+        runs = []
+        run = [pages[0]]
+        for page in pages[1:]:
+            if page.page_id == run[-1].page_id + 1 and len(run) < _MAX_IOV:
+                run.append(page)
+            else:
+                runs.append(run)
+                run = [page]
+        runs.append(run)
+        
+        f = self._get_file()
+        if hasattr(os, 'pwritev'):
+            fd = f.fileno()
+            for run in runs:
+                os.pwritev(fd, [page.data for page in run],
+                           run[0].page_id * _PAGE_SIZE)
+        else:
+            # 不支持pwritev的平台逐段seek后写入
+            for run in runs:
+                f.seek(run[0].page_id * _PAGE_SIZE)
+                for page in run:
+                    f.write(page.data)
+    
+    def _mark_free(self, page_id: int):
+        """在位图中标记页为空闲"""
+        byte_index = page_id >> 3
+        bitmap = self._free_bitmap
+        if byte_index >= len(bitmap):
+            bitmap.extend(bytes(byte_index + 1 - len(bitmap)))
+        mask = 1 << (page_id & 7)
+        if not bitmap[byte_index] & mask:
+            bitmap[byte_index] |= mask
+            self._free_count += 1
+    
+    def _take_free_page(self) -> Optional[int]:
+        """取出编号最小的空闲页，没有空闲页时返回None"""
+        if self._free_count == 0:
+            return None
+        
+        bitmap = self._free_bitmap
+        # 按8字节为一组查找非零字，再用最低位技巧定位
+        for base in range(0, len(bitmap), 8):
+            word = int.from_bytes(bitmap[base:base + 8], 'little')
+            if word:
+                bit = (word & -word).bit_length() - 1
+                page_id = base * 8 + bit
+                bitmap[page_id >> 3] &= ~(1 << (page_id & 7)) & 0xFF
+                self._free_count -= 1
+                return page_id
+        return None
+    
+    def is_free_page(self, page_id: int) -> bool:
+        """页是否空闲"""
+        byte_index = page_id >> 3
+        if page_id < 0 or byte_index >= len(self._free_bitmap):
+            return False
+        return bool(self._free_bitmap[byte_index] & (1 << (page_id & 7)))
+    
+    def allocate_page(self, page_type: str = "data", table_name: str = "",
+                      sync: bool = False) -> int:
+        """分配新页，优先复用已释放的页
+        
+        新页只标记为脏页，首次写入与之后的填充合并为一次写盘；sync=True时立即写入。
+        """
+        page_id = self._take_free_page()
+        if page_id is None:
+            page_id = self.next_page_id
+            self.next_page_id += 1
+            # 扩展文件长度，使文件大小与页数一致
+            f = self._get_file()
+            end = self.next_page_id * _PAGE_SIZE
+            if os.fstat(f.fileno()).st_size < end:
+                f.truncate(end)
         page = Page(page_id)
         page.header.page_type = page_type
         page.header.table_name = table_name
         page.state = PageState.ALLOCATED
+        page.is_dirty = True
         
-        self.pages[page_id] = page
-        self.next_page_id += 1
+        self._cache_page(page)
+        if table_name and self._table_pages is not None:
+            self._table_pages.setdefault(table_name, []).append(page_id)
         
-        # 写入文件
-        self._write_page_to_file(page)
+        if sync:
+            self._write_pages_batched([page])
+            page.is_dirty = False
         
         return page_id
     
     def free_page(self, page_id: int) -> bool:
         """释放页"""
-        if page_id not in self.pages:
+        page = self.read_page(page_id)
+        if page is None:
             return False
         
-        page = self.pages[page_id]
+        owned = self._table_pages.get(page.header.table_name) if self._table_pages else None
+        if owned and page_id in owned:
+            owned.remove(page_id)
+        
         page.header.page_type = "free"
         page.header.table_name = ""
         page.header.record_count = 0
-        page.header.free_space = Page.PAGE_SIZE - Page.HEADER_SIZE
+        page.header.free_space = _PAGE_SIZE - _HEADER_SIZE
         page.state = PageState.FREE
         page.is_dirty = True
         
-        self.free_pages.append(page_id)
+        # 第0页为元数据页，不参与复用
+        if page_id > 0:
+            self._mark_free(page_id)
         
         # 写入文件
         self._write_page_to_file(page)
         
         return True
     
+    def table_page_ids(self, table_name: str) -> Optional[List[int]]:
+        """页头登记为该表的页ID（升序），页目录不可用时返回None"""
+        if self._table_pages is None:
+            return None
+        return sorted(self._table_pages.get(table_name, ()))
+    
     def read_page(self, page_id: int) -> Optional[Page]:
         """读取页"""
-        if page_id in self.pages:
-            return self.pages[page_id]
+        page = self.pages.get(page_id)
+        if page is not None:
+            self.pages.move_to_end(page_id)
+            return page
         
-        # 从文件读取
+        # 尚未写盘的页直接从写回缓冲返回
+        page = self._pending.get(page_id)
+        if page is not None:
+            self._cache_page(page)
+            return page
+        
+        # 从文件映射中读取，只复制一次到页缓冲区
         try:
-            with open(self.data_file, 'rb') as f:
-                f.seek(page_id * Page.PAGE_SIZE)
-                page_data = f.read(Page.PAGE_SIZE)
-                
-                if len(page_data) == Page.PAGE_SIZE:
-                    page = Page(page_id)
+            if page_id < 0:
+                raise ValueError("页号不能为负数")
+            start = page_id * _PAGE_SIZE
+            mm = self._get_mmap(start + _PAGE_SIZE)
+            if mm is not None:
+                page = Page(page_id)
+                with memoryview(mm) as view, view[start:start + _PAGE_SIZE] as page_data:
                     page.from_bytes(page_data)
-                    self.pages[page_id] = page
-                    return page
+                self._cache_page(page)
+                return page
         except Exception as e:
-            print(f"读取页{page_id}失败: {e}")
+            logger.warning(f"读取页{page_id}失败: {e}")
         
         return None
     
+    def read_pages(self, start_id: int, count: int) -> List[Optional[Page]]:
+        """批量读取连续的页，结果与页ID一一对应（不存在的页为None）
+        
+        未缓存的页共用一次映射检查和同一个视图，适合顺序扫描。
+        """
+        result: List[Optional[Page]] = [None] * count
+        missing = []
+        for i in range(count):
+            page_id = start_id + i
+            page = self.pages.get(page_id)
+            if page is None:
+                page = self._pending.get(page_id)
+            if page is not None:
+                self._cache_page(page)
+                result[i] = page
+            elif page_id >= 0:
+                missing.append(i)
+        
+        if not missing:
+            return result
+        
+        try:
+            first = (start_id + missing[0]) * _PAGE_SIZE
+            last_end = (start_id + missing[-1] + 1) * _PAGE_SIZE
+            # 优先映射到整段末尾；文件较短时只要求覆盖第一页，超出部分视为不存在
+            mm = self._get_mmap(last_end) or self._get_mmap(first + _PAGE_SIZE)
+            if mm is None:
+                return result
+            mapped_end = self._mmap_size
+            if _MADV_WILLNEED is not None:
+                # 顺序扫描：提示内核预读整段，缺页时不再逐页同步读盘
+                start = first - first % mmap.PAGESIZE
+                mm.madvise(_MADV_WILLNEED, start, min(last_end, mapped_end) - start)
+            with memoryview(mm) as view:
+                for i in missing:
+                    offset = (start_id + i) * _PAGE_SIZE
+                    if offset + _PAGE_SIZE > mapped_end:
+                        break
+                    page = Page(start_id + i)
+                    with view[offset:offset + _PAGE_SIZE] as page_data:
+                        page.from_bytes(page_data)
+                    self._cache_page(page)
+                    result[i] = page
+        except Exception as e:
+            logger.warning(f"批量读取页{start_id}~{start_id + count - 1}失败: {e}")
+        
+        return result
+    
     def write_page(self, page_id: int, page: Page) -> bool:
         """写入页"""
         try:
-            self.pages[page_id] = page
+            self._cache_page(page)
             self._write_page_to_file(page)
             return True
         except Exception as e:
-            print(f"写入页{page_id}失败: {e}")
+            logger.warning(f"写入页{page_id}失败: {e}")
             return False
     
     def flush_all(self):
         """刷新所有脏页到磁盘"""
-        for page_id, page in self.pages.items():
-            if page.is_dirty:
-                self._write_page_to_file(page)
-                page.is_dirty = False
+        # 脏页与写回缓冲合并后一次写出
+        self.drain_write_back()
         
         # 更新文件头中的页数信息
         self._update_file_header()
@@ -276,40 +580,34 @@ class PageManager:
     def _update_file_header(self):
         """更新文件头中的页数信息"""
         try:
-            with open(self.data_file, 'r+b') as f:
-                # 读取现有文件头
-                f.seek(0)
-                header_data = f.read(16)
-                if len(header_data) < 16:
-                    return
-                
-                # 更新页数信息
-                page_count = len(self.pages)
-                header_data = header_data[:8] + page_count.to_bytes(8, byteorder='little')
-                
-                # 写回文件头
-                f.seek(0)
-                f.write(header_data)
-                f.flush()
-                
-                print(f"更新文件头：页数 = {page_count}")
+            f = self._get_file()
+            page_count = self.get_page_count()
+            
+            # 只写页数字段，不再读取整个文件头
+            count_bytes = _FILE_HEADER_COUNT.pack(page_count)
+            if hasattr(os, 'pwrite'):
+                os.pwrite(f.fileno(), count_bytes, _FILE_HEADER_COUNT_OFFSET)
+            else:
+                f.seek(_FILE_HEADER_COUNT_OFFSET)
+                f.write(count_bytes)
+            logger.debug("更新文件头", page_count=page_count)
         except Exception as e:
-            print(f"更新文件头失败: {e}")
+            logger.error(f"更新文件头失败: {e}")
     
     def get_page_count(self) -> int:
-        """获取页总数"""
-        return len(self.pages)
+        """获取页总数（页ID连续分配，含已释放的页）"""
+        return self.next_page_id
     
     def get_free_page_count(self) -> int:
         """获取空闲页数量"""
-        return len(self.free_pages)
+        return self._free_count
     
     def get_page_info(self, page_id: int) -> Optional[Dict]:
         """获取页信息"""
-        if page_id not in self.pages:
+        page = self.read_page(page_id)
+        if page is None:
             return None
         
-        page = self.pages[page_id]
         return {
             'page_id': page.page_id,
             'page_type': page.header.page_type,
@@ -4,15 +4,76 @@
 管理数据表与页的映射关系
 提供统一的存储访问接口
 """
+import heapq
+import mmap
+import operator
 import struct
-import json
 import os
-from typing import Dict, List, Optional, Any, Tuple
+import time
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
+from functools import lru_cache
 from storage.page_manager import PageManager, Page
 from storage.cache_manager import CacheManager
 from storage.index import IndexManager, IndexType
+from utils.logger import get_logger
+
+# 存储引擎日志：默认INFO级别，经上级database记录器写入database.log；逐页/逐行的调试信息不输出
+logger = get_logger("database.storage")
+
+# 预编译的记录字段格式
+_INT = struct.Struct(">i")
+_UINT = struct.Struct(">I")
+
+# 页内记录长度前缀
+_RECORD_LEN = struct.Struct(">H")
+
+# 数据页类型即页内格式版本 -> (是否带长度前缀, 是否带NULL位图)：
+# data  旧格式，记录紧密排列，扫描时需逐列解析长度；INT的0兼作NULL
+# data2 每条记录前带2字节长度前缀，扫描时按前缀跳转；INT的0兼作NULL
+# data3 在data2基础上，删除标记后跟NULL位图，0与NULL可区分
+_DATA_PAGE = "data"
+_DATA_PAGE_V2 = "data2"
+_DATA_PAGE_V3 = "data3"
+_DATA_PAGE_FORMATS = {
+    _DATA_PAGE: (False, False),
+    _DATA_PAGE_V2: (True, False),
+    _DATA_PAGE_V3: (True, True),
+}
+_DATA_PAGE_TYPES = frozenset(_DATA_PAGE_FORMATS)
+# 新分配及重写的页使用的格式
+_DATA_PAGE_CURRENT = _DATA_PAGE_V3
+# 启动扫描时每次批量读取的页数
+_LOAD_CHUNK_PAGES = 64
+
+# 条件运算符 -> 比较函数
+COMPARATORS = {
+    '=': operator.eq,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '!=': operator.ne,
+}
+
+# 列值与比较值类型一致时的过滤内核：比较内联在推导式中，省去逐值的函数调用
+# 返回命中行号；空值(None)不参与比较
+_FILTER_KERNELS = {
+    '=': lambda values, v: [i for i, x in enumerate(values) if x == v],
+    '!=': lambda values, v: [i for i, x in enumerate(values) if x is not None and x != v],
+    '>': lambda values, v: [i for i, x in enumerate(values) if x is not None and x > v],
+    '<': lambda values, v: [i for i, x in enumerate(values) if x is not None and x < v],
+    '>=': lambda values, v: [i for i, x in enumerate(values) if x is not None and x >= v],
+    '<=': lambda values, v: [i for i, x in enumerate(values) if x is not None and x <= v],
+}
+
+
+@lru_cache(maxsize=4096)
+def _utf8(value: str) -> bytes:
+    """VARCHAR值的UTF-8编码（表名、类型名等重复值很多，结果缓存复用）"""
+    return value.encode('utf-8')
 
 
 class DataType(Enum):
@@ -29,6 +90,25 @@ class ColumnInfo:
     nullable: bool = True
 
 
+def _column_layout(columns: List['ColumnInfo']) -> Tuple[Tuple[str, bool], ...]:
+    """预计算列布局 (列名, 是否INT)，避免逐行比较枚举"""
+    return tuple((col.name, col.data_type == DataType.INT) for col in columns)
+
+
+def _fixed_codec(layout: Tuple[Tuple[str, bool], ...],
+                 null_bitmap: bool = False) -> Optional[struct.Struct]:
+    """全部为INT列时生成整条记录的定长编码器，否则返回None"""
+    if not layout or not all(is_int for _, is_int in layout):
+        return None
+    bitmap = f"{_bitmap_size(len(layout))}s" if null_bitmap else ""
+    return struct.Struct(">B" + bitmap + "i" * len(layout))
+
+
+def _bitmap_size(column_count: int) -> int:
+    """NULL位图字节数：第i列对应第i//8字节的第i%8位"""
+    return (column_count + 7) // 8
+
+
 @dataclass
 class Record:
     """记录类"""
@@ -43,102 +123,256 @@ class Record:
         """设置列值"""
         self.data[column_name] = value
     
-    def to_bytes(self, columns: List[ColumnInfo]) -> bytes:
+    def to_bytes(self, columns: List[ColumnInfo],
+                 layout: Optional[Tuple[Tuple[str, bool], ...]] = None,
+                 null_bitmap: bool = False) -> bytes:
         """序列化为字节数组"""
-        # 记录格式: [删除标记(1字节)] + [列数据]
-        result = bytearray()
-        
-        # 删除标记
-        result.append(1 if self.is_deleted else 0)
-        
-        # 列数据
-        for col in columns:
-            value = self.data.get(col.name)
-            
-            if col.data_type == DataType.INT:
-                if value is None:
-                    result.extend(struct.pack(">i", 0))  # NULL值用0表示
-                else:
-                    result.extend(struct.pack(">i", int(value)))
-            elif col.data_type == DataType.VARCHAR:
-                if value is None:
-                    # NULL字符串用长度0表示
-                    result.extend(struct.pack(">I", 0))
-                else:
-                    str_bytes = str(value).encode('utf-8')
-                    result.extend(struct.pack(">I", len(str_bytes)))
-                    result.extend(str_bytes)
+        # 记录格式: [删除标记(1字节)] + [NULL位图(可选)] + [列数据]
+        if layout is None:
+            layout = _column_layout(columns)
+        size, values, nulls = self._encode_fields(layout, null_bitmap)
+        buf = bytearray(size)
+        self._pack_fields(buf, 0, layout, values, nulls, null_bitmap)
+        return bytes(buf)
+    
+    def _encode_fields(self, layout: Tuple[Tuple[str, bool], ...],
+                       null_bitmap: bool) -> Tuple[int, List[Any], int]:
+        """第一遍：INT取整、VARCHAR只编码一次，返回(记录总长, 列值列表, NULL位图)"""
+        data = self.data
+        values = []
+        nulls = 0
+        size = 1 + (_bitmap_size(len(layout)) if null_bitmap else 0) + 4 * len(layout)
+        for i, (name, is_int) in enumerate(layout):
+            value = data.get(name)
+            if value is None:
+                # NULL：INT写0、字符串写长度0；有位图时另置位标记
+                nulls |= 1 << i
+                values.append(0 if is_int else b'')
+            elif is_int:
+                values.append(int(value))
+            else:
+                str_bytes = _utf8(value) if isinstance(value, str) else str(value).encode('utf-8')
+                size += len(str_bytes)
+                values.append(str_bytes)
+        return size, values, nulls
+    
+    def _pack_fields(self, buf, offset: int, layout: Tuple[Tuple[str, bool], ...],
+                     values: List[Any], nulls: int, null_bitmap: bool):
+        """第二遍：把记录写入buf的offset处（逐字节覆盖，不依赖缓冲区原有内容）"""
+        buf[offset] = 1 if self.is_deleted else 0
+        offset += 1
+        if null_bitmap:
+            bitmap_size = _bitmap_size(len(layout))
+            buf[offset:offset + bitmap_size] = nulls.to_bytes(bitmap_size, 'little')
+            offset += bitmap_size
+        for (_, is_int), value in zip(layout, values):
+            if is_int:
+                _INT.pack_into(buf, offset, value)
+                offset += 4
+            else:
+                length = len(value)
+                _UINT.pack_into(buf, offset, length)
+                buf[offset + 4:offset + 4 + length] = value
+                offset += 4 + length
+    
+    def to_bytes_fixed(self, codec: struct.Struct, names: Tuple[str, ...],
+                       null_bitmap: bool = False) -> bytes:
+        """定长记录的快速序列化（所有列均为INT）"""
+        return codec.pack(*self._fixed_args(names, null_bitmap))
+    
+    def _fixed_args(self, names: Tuple[str, ...], null_bitmap: bool) -> List[Any]:
+        """定长编码器的打包参数：删除标记、(NULL位图)、各INT列"""
+        values = list(map(self.data.get, names))
+        args = [1 if self.is_deleted else 0]
+        if null_bitmap:
+            nulls = sum(1 << i for i, value in enumerate(values) if value is None)
+            args.append(nulls.to_bytes(_bitmap_size(len(names)), 'little'))
+        args.extend(0 if value is None else int(value) for value in values)
+        return args
+    
+    @classmethod
+    def from_bytes_fixed(cls, data, offset: int, codec: struct.Struct,
+                         names: Tuple[str, ...], null_bitmap: bool = False) -> 'Record':
+        """定长记录的快速反序列化；无位图时0值还原为NULL"""
+        return cls.from_fixed_row(codec.unpack_from(data, offset), names, null_bitmap)
+    
+    @classmethod
+    def from_fixed_row(cls, row: Tuple, names: Tuple[str, ...],
+                       null_bitmap: bool = False) -> 'Record':
+        """由定长编码器解出的元组构造记录"""
+        if not null_bitmap:
+            deleted, *values = row
+            return cls(data={name: (value if value != 0 else None)
+                             for name, value in zip(names, values)},
+                       is_deleted=bool(deleted))
         
-        return bytes(result)
+        deleted, bitmap, *values = row
+        nulls = int.from_bytes(bitmap, 'little')
+        if not nulls:
+            return cls(data=dict(zip(names, values)), is_deleted=bool(deleted))
+        return cls(data={name: (None if nulls >> i & 1 else value)
+                         for i, (name, value) in enumerate(zip(names, values))},
+                   is_deleted=bool(deleted))
     
     @classmethod
-    def from_bytes(cls, data: bytes, columns: List[ColumnInfo]) -> 'Record':
+    def from_bytes(cls, data: bytes, columns: List[ColumnInfo],
+                   layout: Optional[Tuple[Tuple[str, bool], ...]] = None,
+                   null_bitmap: bool = False) -> 'Record':
         """从字节数组反序列化"""
-        if len(data) < 1:
+        data_len = len(data)
+        if data_len < 1:
             raise ValueError("数据太短，无法读取删除标记")
-        
-        offset = 0
+        if layout is None:
+            layout = _column_layout(columns)
         
         # 读取删除标记
-        is_deleted = bool(data[offset])
-        offset += 1
+        is_deleted = bool(data[0])
+        offset = 1
+        
+        # 读取NULL位图；无位图的旧格式中INT的0和空字符串表示NULL
+        nulls = 0
+        if null_bitmap:
+            bitmap_size = _bitmap_size(len(layout))
+            if offset + bitmap_size > data_len:
+                raise ValueError("数据不足，无法读取NULL位图")
+            nulls = int.from_bytes(data[offset:offset + bitmap_size], 'little')
+            offset += bitmap_size
         
         # 读取列数据
         record_data = {}
-        for col in columns:
-            if col.data_type == DataType.INT:
-                if offset + 4 > len(data):
-                    raise ValueError(f"数据不足，无法读取INT列 {col.name}")
-                value = struct.unpack(">i", data[offset:offset + 4])[0]
+        for i, (name, is_int) in enumerate(layout):
+            is_null = nulls >> i & 1
+            if is_int:
+                if offset + 4 > data_len:
+                    raise ValueError(f"数据不足，无法读取INT列 {name}")
+                value = _INT.unpack_from(data, offset)[0]
                 offset += 4
-                record_data[col.name] = value if value != 0 else None
-            elif col.data_type == DataType.VARCHAR:
-                if offset + 4 > len(data):
-                    raise ValueError(f"数据不足，无法读取VARCHAR列 {col.name} 的长度")
-                length = struct.unpack(">I", data[offset:offset + 4])[0]
+                if is_null or (value == 0 and not null_bitmap):
+                    value = None
+                record_data[name] = value
+            else:
+                if offset + 4 > data_len:
+                    raise ValueError(f"数据不足，无法读取VARCHAR列 {name} 的长度")
+                length = _UINT.unpack_from(data, offset)[0]
                 offset += 4
-                if length > 0:
-                    if offset + length > len(data):
-                        raise ValueError(f"数据不足，无法读取VARCHAR列 {col.name} 的内容")
+                if is_null:
+                    record_data[name] = None
+                    offset += length
+                elif length > 0 or null_bitmap:
+                    if offset + length > data_len:
+                        raise ValueError(f"数据不足，无法读取VARCHAR列 {name} 的内容")
                     try:
-                        value = data[offset:offset + length].decode('utf-8')
-                        record_data[col.name] = value
+                        record_data[name] = bytes(data[offset:offset + length]).decode('utf-8')
                     except UnicodeDecodeError as e:
-                        raise ValueError(f"VARCHAR列 {col.name} 解码失败: {e}")
+                        raise ValueError(f"VARCHAR列 {name} 解码失败: {e}")
                     offset += length
                 else:
-                    record_data[col.name] = None
+                    record_data[name] = None
         
         return cls(data=record_data, is_deleted=is_deleted)
 
 
+class RecordBatch(Sequence):
+    """列式查询结果：按列保存命中行的值，按下标访问时才构造Record
+    
+    列表引用的是列式缓存中的列，缓存失效时整体替换而不是原地修改，因此结果不受之后的写操作影响。
+    """
+    
+    __slots__ = ('columns', 'rows', 'names')
+    
+    def __init__(self, columns: Dict[str, List[Any]], rows: List[int], names: Tuple[str, ...]):
+        self.columns = columns
+        self.rows = rows  # 命中行在各列中的下标
+        self.names = names
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._make_record(i) for i in self.rows[index]]
+        return self._make_record(self.rows[index])
+    
+    def __iter__(self):
+        make_record = self._make_record
+        return (make_record(i) for i in self.rows)
+    
+    def _make_record(self, i: int) -> Record:
+        columns = self.columns
+        return Record(data={name: columns[name][i] for name in self.names})
+
+
 class TableStorage:
     """表存储管理器"""
     
     def __init__(self, table_name: str, columns: List[ColumnInfo], 
-                 page_manager: PageManager, cache_manager: CacheManager):
+                 page_manager: PageManager, cache_manager: CacheManager,
+                 index_manager: Optional[IndexManager] = None):
         self.table_name = table_name
         self.columns = columns
+        self._layout = _column_layout(columns)  # 缓存列布局，供逐行序列化使用
+        self._names = tuple(name for name, _ in self._layout)
+        self._column_is_int = dict(self._layout)  # 列名 -> 是否INT，条件与索引路径按列名查类型
+        # 全INT表使用定长编码器，一次C调用完成整条记录的打包/解包
+        # 按是否带NULL位图各备一个：False -> 旧格式，True -> 当前格式
+        self._fixed_codecs = {flag: _fixed_codec(self._layout, flag) for flag in (False, True)}
+        # 整页扫描用的行格式 (是否带长度前缀, 是否带位图) -> Struct，供iter_unpack按固定步长批量解包
+        # 长度前缀按填充字节跳过，两种页解出的元组形状一致
+        self._fixed_rows: Dict[Tuple[bool, bool], struct.Struct] = {}
+        for flag, codec in self._fixed_codecs.items():
+            if codec is not None:
+                self._fixed_rows[(False, flag)] = codec
+                self._fixed_rows[(True, flag)] = struct.Struct(">2x" + codec.format[1:])
         self.page_manager = page_manager
         self.cache_manager = cache_manager
+        self.index_manager = index_manager  # 条件扫描时用于按索引裁剪候选页
         self.data_pages: List[int] = []  # 数据页列表
+        self.last_insert_location: Optional[Tuple[int, int]] = None  # 最近插入记录的(页ID, 偏移)
+        self.relocated_count = 0  # 因重写放不下而挪到其他页的记录数
         self.free_space_map: Dict[int, int] = {}  # 页ID -> 可用空间
+        # (-可用空间, 页ID) 最大堆，过期条目在查找时惰性丢弃
+        self._free_heap: List[Tuple[int, int]] = []
+        # 列式缓存：列名 -> 按行排列的值列表，写操作后失效
+        self._columnar_cache: Optional[Dict[str, List[Any]]] = None
+        self._deleted_flags: List[bool] = []
+        # 列式缓存中VARCHAR值的字典：相同字符串只保留一个对象，随缓存一起重建
+        self._strings: Dict[Optional[str], Optional[str]] = {}
+        # 未删除记录数：首次用到时统计，之后随插入/删除增减
+        self._live_count: Optional[int] = None
         
         # 扫描磁盘上的现有页面
         self._load_existing_pages()
     
     def _load_existing_pages(self):
-        """扫描磁盘上的现有页面并加载到data_pages中"""
+        """加载磁盘上属于当前表的页面到data_pages中"""
+        page_ids = self.page_manager.table_page_ids(self.table_name)
+        if page_ids is None:
+            self._scan_existing_pages()
+            return
+        
+        # 按页目录只读取本表的页，无需扫描整个文件
+        for page_id in page_ids:
+            try:
+                page = self.page_manager.read_page(page_id)
+                if page is not None and self._page_belongs_to_table(page):
+                    self.data_pages.append(page_id)
+                    self._set_free_space(page_id, page.header.free_space)
+            except Exception as e:
+                logger.warning(f"读取页面{page_id}失败: {e}", table=self.table_name)
+        logger.debug("页面加载完成", table=self.table_name, pages=len(self.data_pages))
+    
+    def _scan_existing_pages(self):
+        """扫描磁盘上的所有页面，查找属于当前表的页（页目录不可用时的后备路径）"""
         try:
             # 检查磁盘文件是否存在
             if not os.path.exists(self.page_manager.data_file):
-                print(f"数据文件不存在，表 {self.table_name} 为新表")
+                logger.debug("数据文件不存在，新表", table=self.table_name)
                 return
             
             # 获取文件大小
             file_size = os.path.getsize(self.page_manager.data_file)
             if file_size < 16:
-                print(f"数据文件太小，表 {self.table_name} 为新表")
+                logger.debug("数据文件太小，新表", table=self.table_name)
                 return
             
             # 读取文件头，获取页数
@@ -148,16 +382,14 @@ class TableStorage:
                     return
                 
                 page_count = int.from_bytes(header_data[8:16], byteorder='little')
-                print(f"表 {self.table_name}: 文件中有 {page_count} 页")
+                logger.debug("扫描数据文件", table=self.table_name, page_count=page_count)
                 
                 if page_count == 0:
                     return
                 
-                # 扫描所有页面，查找属于当前表的页面
-                for page_id in range(1, page_count + 1):  # 页ID从1开始
+                # 扫描所有页面，查找属于当前表的页面（按块批量读取连续页）
+                for page_id, page in self._iter_file_pages(page_count):
                     try:
-                        # 读取页面
-                        page = self.page_manager.read_page(page_id)
                         if page is None:
                             continue
                         
@@ -166,58 +398,86 @@ class TableStorage:
                             self.data_pages.append(page_id)
                             # 计算可用空间
                             free_space = page.header.free_space
-                            self.free_space_map[page_id] = free_space
-                            print(f"表 {self.table_name}: 加载页面 {page_id}，可用空间: {free_space}")
+                            self._set_free_space(page_id, free_space)
+                            logger.debug("加载页面", table=self.table_name, page_id=page_id,
+                                         free_space=free_space)
                     except Exception as e:
-                        print(f"读取页面 {page_id} 失败: {e}")
+                        logger.warning(f"读取页面{page_id}失败: {e}", table=self.table_name)
                         continue
                 
-                print(f"表 {self.table_name}: 加载了 {len(self.data_pages)} 个页面")
+                logger.debug("页面加载完成", table=self.table_name, pages=len(self.data_pages))
         except Exception as e:
-            print(f"扫描现有页面失败: {e}")
+            logger.error(f"扫描现有页面失败: {e}", table=self.table_name)
+    
+    def _iter_file_pages(self, page_count: int):
+        """按块顺序读取页1..page_count，逐个产出(页ID, 页)"""
+        for chunk_start in range(1, page_count + 1, _LOAD_CHUNK_PAGES):  # 页ID从1开始
+            count = min(_LOAD_CHUNK_PAGES, page_count + 1 - chunk_start)
+            pages = self.page_manager.read_pages(chunk_start, count)
+            yield from enumerate(pages, start=chunk_start)
     
     def _page_belongs_to_table(self, page) -> bool:
         """判断页面是否属于当前表"""
         # 检查页面类型和表名是否匹配
-        return (page.header.page_type == 'data' and 
+        return (page.header.page_type in _DATA_PAGE_TYPES and 
                 page.header.table_name == self.table_name)
     
     def insert_record(self, record: Record) -> bool:
         """插入记录"""
-        # 序列化记录
-        record_bytes = record.to_bytes(self.columns)
-        record_size = len(record_bytes)
+        # 编码记录（按当前格式估算所需空间），之后直接写入页缓冲区，不产生中间字节串
+        size, pack = self._record_packer(record, null_bitmap=True)
+        record_size = size + _RECORD_LEN.size
         
         # 查找有足够空间的页
         page_id = self._find_page_with_space(record_size)
         if page_id is None:
             # 分配新页
-            page_id = self.page_manager.allocate_page("data", self.table_name)
+            page_id = self.page_manager.allocate_page(_DATA_PAGE_CURRENT, self.table_name)
             self.data_pages.append(page_id)
-            self.free_space_map[page_id] = Page.PAGE_SIZE - Page.HEADER_SIZE
+            self._set_free_space(page_id, Page.PAGE_SIZE - Page.HEADER_SIZE)
         
         # 获取页
         page = self.cache_manager.get_page(page_id)
         if page is None:
             return False
         
+        # 旧格式页沿用该页的格式写入
+        prefixed, null_bitmap = _DATA_PAGE_FORMATS[page.header.page_type]
+        if not null_bitmap:
+            size, pack = self._record_packer(record, null_bitmap=False)
+        record_size = size + (_RECORD_LEN.size if prefixed else 0)
+        
         # 分配空间
         offset = page.allocate_space(record_size)
-        if offset is None:
+        if offset is None or offset + record_size > Page.PAGE_SIZE:
             return False
         
         # 写入记录
-        if not page.write_data(offset, record_bytes):
-            return False
+        self.last_insert_location = (page_id, offset)
+        if prefixed:
+            _RECORD_LEN.pack_into(page.data, offset, size)
+            offset += _RECORD_LEN.size
+        pack(page.data, offset)
+        page.is_dirty = True
         
         # 更新可用空间
-        self.free_space_map[page_id] = page.get_free_space()
+        self._set_free_space(page_id, page.get_free_space())
         
         # 标记页为脏
         self.cache_manager.mark_dirty(page_id)
+        self._columnar_cache = None
+        if self._live_count is not None and not record.is_deleted:
+            self._live_count += 1
         
         return True
     
+    def live_row_count(self) -> int:
+        """未删除的记录数"""
+        if self._live_count is None:
+            self._get_columnar_cache()
+            self._live_count = self._deleted_flags.count(False)
+        return self._live_count
+    
     def get_all_records(self) -> List[Record]:
         """获取所有记录"""
         records = []
@@ -232,19 +492,115 @@ class TableStorage:
         
         return records
     
-    def get_records_with_condition(self, condition: Dict[str, Any]) -> List[Record]:
-        """根据条件获取记录"""
-        all_records = self.get_all_records()
-        filtered_records = []
+    def get_records_with_condition(self, condition: Dict[str, Any]) -> Sequence[Record]:
+        """根据条件获取记录
         
-        for record in all_records:
-            if record.is_deleted:
-                continue
-            
-            if self._matches_condition(record, condition):
-                filtered_records.append(record)
+        有可用索引时返回Record列表；否则在列式缓存上过滤，返回RecordBatch（访问时才构造Record）。
+        调用方只应按Record序列使用结果。
+        """
+        candidate_pages = self._candidate_pages(condition)
+        if candidate_pages is not None:
+            # 有可用索引：只扫描索引指向的页，再按条件精确过滤
+            pred = self._compile_predicate(condition)
+            records = []
+            for page_id in candidate_pages:
+                page = self.cache_manager.get_page(page_id)
+                if page is None:
+                    continue
+                records.extend(record for record in self._extract_records_from_page(page)
+                               if not record.is_deleted and pred(record.data))
+            return records
+        
+        columns = self._get_columnar_cache()
+        deleted = self._deleted_flags
+        
+        if not condition:
+            rows = [i for i, flag in enumerate(deleted) if not flag]
+        else:
+            column = condition.get('column')
+            values = columns.get(column)
+            rows = self._run_filter_kernel(values, condition)
+            if rows is not None:
+                if any(deleted):
+                    rows = [i for i in rows if not deleted[i]]
+            else:
+                test = self._compile_value_test(condition)
+                if test is None or values is None:
+                    return []
+                rows = [i for i, record_value in enumerate(values)
+                        if not deleted[i] and test(record_value)]
+        
+        return RecordBatch(columns, rows, self._names)
+    
+    def _run_filter_kernel(self, values: Optional[List[Any]],
+                           condition: Dict[str, Any]) -> Optional[List[int]]:
+        """列值类型单一时用专用内核过滤整列，返回命中行号（含已删除行）；不适用时返回None
+        
+        INT列的值只有int和None，VARCHAR列只有str和None；比较值可换算成同一类型时
+        结果与_compile_value_test逐值测试一致。
+        """
+        op = condition.get('operator')
+        kernel = _FILTER_KERNELS.get(op)
+        value = condition.get('value')
+        if kernel is None or values is None or value is None:
+            return None
+        
+        is_int = self._column_is_int.get(condition.get('column'))
+        if is_int:
+            if isinstance(value, str):
+                if not value.isdigit():
+                    return None
+                try:
+                    value = int(value)
+                except ValueError:
+                    return []  # 非ASCII数字串：与INT值比较恒不成立
+            elif not isinstance(value, (int, float)):
+                return None
+        elif not isinstance(value, str):
+            return None
+        elif op == '=' and value not in self._strings:
+            return []  # 字典中没有该值：任何VARCHAR列都不可能相等
+        return kernel(values, value)
+    
+    def _candidate_pages(self, condition: Dict[str, Any]) -> Optional[List[int]]:
+        """通过索引确定可能含有匹配记录的页，无法使用索引时返回None"""
+        if not condition or self.index_manager is None:
+            return None
         
-        return filtered_records
+        column = condition.get('column')
+        value = condition.get('value')
+        is_int = self._column_is_int.get(column)
+        # 只在比较值与列类型一致时使用索引，跨类型比较仍走全表扫描
+        if is_int is None or isinstance(value, bool):
+            return None
+        if not isinstance(value, int if is_int else str):
+            return None
+        
+        locations = self.index_manager.lookup(self.table_name, column,
+                                              condition.get('operator'), value)
+        if locations is None:
+            return None
+        
+        page_ids = {page_id for page_id, _ in locations}
+        if len(page_ids) >= len(self.data_pages):
+            return None  # 裁剪不掉任何页，列式缓存扫描更快
+        return [page_id for page_id in self.data_pages if page_id in page_ids]
+    
+    def _get_columnar_cache(self) -> Dict[str, List[Any]]:
+        """按需从数据页构建列式缓存"""
+        if self._columnar_cache is None:
+            records = self.get_all_records()
+            columns = {}
+            strings = {}
+            intern = strings.setdefault
+            for name, is_int in self._layout:
+                values = [record.data.get(name) for record in records]
+                # VARCHAR列去重：重复值共享同一个字符串对象，哈希值也只算一次
+                columns[name] = values if is_int else list(map(intern, values, values))
+            self._columnar_cache = columns
+            self._strings = strings
+            self._deleted_flags = [record.is_deleted for record in records]
+        return self._columnar_cache
     
     def delete_record(self, table_name: str, condition: Dict[str, Any]) -> bool:
         """删除记录（简化实现）"""
@@ -261,8 +617,10 @@ class TableStorage:
     def delete_records(self, condition: Dict[str, Any]) -> int:
         """删除满足条件的记录"""
         deleted_count = 0
+        pred = self._compile_predicate(condition)
+        overflow: List[Record] = []
         
-        for page_id in self.data_pages:
+        for page_id in list(self.data_pages):
             page = self.cache_manager.get_page(page_id)
             if page is None:
                 continue
@@ -271,24 +629,32 @@ class TableStorage:
             page_records = self._extract_records_from_page(page)
             
             # 标记要删除的记录
-            for i, record in enumerate(page_records):
-                if not record.is_deleted and self._matches_condition(record, condition):
+            page_deleted = 0
+            for record in page_records:
+                if not record.is_deleted and pred(record.data):
                     record.is_deleted = True
-                    deleted_count += 1
+                    page_deleted += 1
             
-            # 重新写入整个页面的记录
-            if deleted_count > 0:
-                self._rewrite_page_records(page, page_records)
+            # 重新写入整个页面的记录（只处理本页有删除的页）
+            if page_deleted > 0:
+                deleted_count += page_deleted
+                self._columnar_cache = None
+                overflow.extend(self._rewrite_page_records(page, page_records))
                 self.cache_manager.mark_dirty(page_id)
         
+        if self._live_count is not None:
+            self._live_count -= deleted_count
+        self._reinsert_overflow(overflow)
         return deleted_count
     
     def update_records(self, update_data: Dict[str, Any], condition: Dict[str, Any]) -> int:
         """更新记录"""
         updated_count = 0
+        pred = self._compile_predicate(condition)
+        overflow: List[Record] = []
         
-        # 遍历所有数据页
-        for page_id in self.data_pages:
+        # 遍历所有数据页（快照：溢出记录在遍历结束后才插入，避免被重复更新）
+        for page_id in list(self.data_pages):
             page = self.cache_manager.get_page(page_id)
             if page is None:
                 continue
@@ -297,52 +663,226 @@ class TableStorage:
             page_records = self._extract_records_from_page(page)
             
             # 更新匹配条件的记录
+            changed = []
             for i, record in enumerate(page_records):
-                if not record.is_deleted and self._matches_condition(record, condition):
+                if not record.is_deleted and pred(record.data):
                     # 更新记录数据
                     for column, value in update_data.items():
                         if column in record.data:
                             record.data[column] = value
                     
-                    updated_count += 1
+                    changed.append((i, record))
             
-            # 重新写入整个页面的记录
-            if updated_count > 0:
-                self._rewrite_page_records(page, page_records)
-                self.cache_manager.mark_dirty(page_id)
+            if not changed:
+                continue
+            updated_count += len(changed)
+            self._columnar_cache = None
+            
+            # 新编码与原记录等长时原地覆盖，否则重新写入整个页面的记录
+            if not self._overwrite_records_in_place(page, page_records, changed):
+                overflow.extend(self._rewrite_page_records(page, page_records))
+            self.cache_manager.mark_dirty(page_id)
         
+        self._reinsert_overflow(overflow)
         return updated_count
     
+    def _reinsert_overflow(self, records: List[Record]):
+        """把重写时本页放不下的记录插入到其他页"""
+        self.relocated_count += len(records)
+        # 这些记录已从原页移除，重新插入成功时再计入
+        if self._live_count is not None:
+            self._live_count -= len(records)
+        for record in records:
+            if not self.insert_record(record):
+                logger.error("溢出记录重新插入失败", table=self.table_name, record=record.data)
+    
+    def _overwrite_records_in_place(self, page: Page, page_records: List[Record],
+                                    changed: List[Tuple[int, Record]]) -> bool:
+        """按页的格式重新编码被修改的记录，全部等长时原地写回，返回是否成功"""
+        spans = self._record_spans(page)
+        if len(spans) != len(page_records):
+            return False
+        
+        _, null_bitmap = _DATA_PAGE_FORMATS[page.header.page_type]
+        encoded = []
+        for i, record in changed:
+            offset, size = spans[i]
+            record_bytes = self._encode_record(record, null_bitmap)
+            if len(record_bytes) != size:
+                return False
+            encoded.append((offset, record_bytes))
+        
+        for offset, record_bytes in encoded:
+            page.write_data(offset, record_bytes)
+        return True
+    
+    def _record_spans(self, page: Page) -> List[Tuple[int, int]]:
+        """页中各条记录数据的(偏移, 长度)，顺序与_extract_records_from_page一致"""
+        prefixed, _ = _DATA_PAGE_FORMATS.get(page.header.page_type, (False, False))
+        fixed = self._fixed_codecs[False]
+        data = page.data
+        spans = []
+        offset = Page.HEADER_SIZE
+        for _ in range(page.header.record_count):
+            if prefixed:
+                if offset + _RECORD_LEN.size > Page.PAGE_SIZE:
+                    break
+                size = _RECORD_LEN.unpack_from(data, offset)[0]
+                offset += _RECORD_LEN.size
+            elif fixed is not None:
+                size = fixed.size
+            else:
+                size = self._calculate_record_size(data, offset)
+            if size <= 0 or offset + size > Page.PAGE_SIZE:
+                break
+            spans.append((offset, size))
+            offset += size
+        return spans
+    
     def _find_page_with_space(self, required_space: int) -> Optional[int]:
-        """查找有足够空间的页"""
-        for page_id, free_space in self.free_space_map.items():
-            if free_space >= required_space:
-                return page_id
+        """查找有足够空间的页（取可用空间最大的页）"""
+        heap = self._free_heap
+        while heap:
+            neg_free, page_id = heap[0]
+            if self.free_space_map.get(page_id) != -neg_free:
+                heapq.heappop(heap)  # 过期条目
+                continue
+            return page_id if -neg_free >= required_space else None
         return None
     
+    def _set_free_space(self, page_id: int, free_space: int):
+        """更新页的可用空间，同步维护空闲堆"""
+        self.free_space_map[page_id] = free_space
+        heap = self._free_heap
+        if len(heap) > 2 * len(self.free_space_map) + 16:
+            # 过期条目过多时重建
+            heap[:] = [(-free, pid) for pid, free in self.free_space_map.items()]
+            heapq.heapify(heap)
+        else:
+            heapq.heappush(heap, (-free_space, page_id))
+    
+    def _record_packer(self, record: Record,
+                       null_bitmap: bool) -> Tuple[int, Callable[[bytearray, int], None]]:
+        """返回记录编码后的长度，以及把记录写入缓冲区指定偏移处的函数"""
+        codec = self._fixed_codecs[null_bitmap]
+        if codec is not None:
+            args = record._fixed_args(self._names, null_bitmap)
+            return codec.size, lambda buf, offset: codec.pack_into(buf, offset, *args)
+        
+        layout = self._layout
+        size, values, nulls = record._encode_fields(layout, null_bitmap)
+        return size, lambda buf, offset: record._pack_fields(buf, offset, layout, values,
+                                                             nulls, null_bitmap)
+    
+    def _encode_record(self, record: Record, null_bitmap: bool) -> bytes:
+        """按表布局序列化记录"""
+        codec = self._fixed_codecs[null_bitmap]
+        if codec is not None:
+            return record.to_bytes_fixed(codec, self._names, null_bitmap)
+        return record.to_bytes(self.columns, self._layout, null_bitmap)
+    
     def _extract_records_from_page(self, page: Page) -> List[Record]:
         """从页中提取记录"""
         records = []
         offset = Page.HEADER_SIZE
         
-        # 提取所有记录
-        for i in range(page.header.record_count):
-            try:
-                # 计算记录大小
-                record_size = self._calculate_record_size(page.data, offset)
-                if record_size <= 0 or offset + record_size > Page.PAGE_SIZE:
+        prefixed, null_bitmap = _DATA_PAGE_FORMATS.get(page.header.page_type, (False, False))
+        if self._fixed_rows:
+            return self._extract_fixed_records(page, prefixed, null_bitmap)
+        if prefixed:
+            return self._extract_prefixed_records(page, null_bitmap)
+        
+        # 提取所有记录：在页缓冲区的视图上切片，不逐条复制记录字节
+        with memoryview(page.data) as view:
+            for i in range(page.header.record_count):
+                try:
+                    # 计算记录大小
+                    record_size = self._calculate_record_size(page.data, offset)
+                    if record_size <= 0 or offset + record_size > Page.PAGE_SIZE:
+                        break
+                    
+                    records.append(Record.from_bytes(view[offset:offset + record_size],
+                                                     self.columns, self._layout))
+                    offset += record_size
+                except Exception as e:
+                    logger.warning(f"提取记录{i}失败: {e}", table=self.table_name)
                     break
-                
-                # 提取记录数据
-                record_data = page.read_data(offset, record_size)
-                if len(record_data) == record_size:
-                    record = Record.from_bytes(record_data, self.columns)
-                    records.append(record)
-                
-                offset += record_size
-            except Exception as e:
-                print(f"提取记录{i}失败: {e}")
-                break
+        
+        return records
+    
+    def _extract_fixed_records(self, page: Page, prefixed: bool,
+                               null_bitmap: bool) -> List[Record]:
+        """全INT表：整页记录步长固定，用iter_unpack一次解包整段数据"""
+        rows = self._fixed_rows[(prefixed, null_bitmap)]
+        start = Page.HEADER_SIZE
+        count = min(page.header.record_count, (Page.PAGE_SIZE - start) // rows.size)
+        names = self._names
+        from_row = Record.from_fixed_row
+        with memoryview(page.data) as view:
+            return [from_row(row, names, null_bitmap)
+                    for row in rows.iter_unpack(view[start:start + count * rows.size])]
+    
+    def iter_live_records_flat(self) -> Iterator[Tuple[int, int, Record]]:
+        """把所有页展平为一条(页ID, 偏移, 记录)序列，只产出未删除的记录"""
+        for page_id in self.data_pages:
+            page = self.cache_manager.get_page(page_id)
+            if page is None:
+                continue
+            
+            records = self._extract_records_from_page(page)
+            spans = self._record_spans(page)
+            if len(spans) == len(records):
+                # 与插入时记录的位置一致：带长度前缀的页取前缀处的偏移
+                prefixed, _ = _DATA_PAGE_FORMATS.get(page.header.page_type, (False, False))
+                shift = _RECORD_LEN.size if prefixed else 0
+                offsets = [offset - shift for offset, _ in spans]
+            else:
+                offsets = [Page.HEADER_SIZE] * len(records)
+            
+            for record, offset in zip(records, offsets):
+                if not record.is_deleted:
+                    yield page_id, offset, record
+    
+    def column_locations(self, column_name: str) -> List[Tuple[Any, Tuple[int, int]]]:
+        """收集未删除记录在该列的非空值及位置(页ID, 偏移)，供批量建索引"""
+        return self.columns_locations([column_name])[column_name]
+    
+    def columns_locations(self, column_names: List[str]) -> Dict[str, List[Tuple[Any, Tuple[int, int]]]]:
+        """一次遍历同时收集多列的(键, 位置)条目，多个索引一起重建时只扫描一遍"""
+        entries: Dict[str, List[Tuple[Any, Tuple[int, int]]]] = {name: [] for name in column_names}
+        # 重复的键共享同一个对象，减少索引占用
+        keys: Dict[Any, Any] = {}
+        targets = list(entries.items())
+        for page_id, offset, record in self.iter_live_records_flat():
+            get = record.data.get
+            location = (page_id, offset)
+            for name, column_entries in targets:
+                key = get(name)
+                if key is not None:
+                    column_entries.append((keys.setdefault(key, key), location))
+        return entries
+    
+    def _extract_prefixed_records(self, page: Page, null_bitmap: bool) -> List[Record]:
+        """从带长度前缀的页中提取记录：按前缀跳转，无需逐列解析"""
+        records = []
+        offset = Page.HEADER_SIZE
+        data = page.data
+        
+        with memoryview(data) as view:
+            for i in range(page.header.record_count):
+                if offset + _RECORD_LEN.size > Page.PAGE_SIZE:
+                    break
+                start = offset + _RECORD_LEN.size
+                end = start + _RECORD_LEN.unpack_from(data, offset)[0]
+                if end == start or end > Page.PAGE_SIZE:
+                    break
+                try:
+                    records.append(Record.from_bytes(view[start:end], self.columns,
+                                                     self._layout, null_bitmap))
+                except Exception as e:
+                    logger.warning(f"提取记录{i}失败: {e}", table=self.table_name)
+                    break
+                offset = end
         
         return records
     
@@ -351,29 +891,34 @@ class TableStorage:
         if offset >= len(data):
             return 0
         
-        size = 1  # 删除标记
+        data_len = len(data)
         current_offset = offset + 1  # 跳过删除标记
         
-        for col in self.columns:
-            if col.data_type == DataType.INT:
-                if current_offset + 4 > len(data):
-                    return 0
-                size += 4
+        for _, is_int in self._layout:
+            if current_offset + 4 > data_len:
+                return 0
+            if is_int:
                 current_offset += 4
-            elif col.data_type == DataType.VARCHAR:
-                if current_offset + 4 > len(data):
-                    return 0
-                try:
-                    length = struct.unpack(">I", data[current_offset:current_offset + 4])[0]
-                    size += 4 + length
-                    current_offset += 4 + length
-                except struct.error:
-                    return 0
+            else:
+                current_offset += 4 + _UINT.unpack_from(data, current_offset)[0]
         
-        return size
+        return current_offset - offset
     
-    def _rewrite_page_records(self, page: Page, records: List[Record]):
-        """重新写入页面记录"""
+    def _rewrite_page_records(self, page: Page, records: List[Record]) -> List[Record]:
+        """重新写入页面记录（放得下时顺带升级为当前格式），返回本页放不下的记录"""
+        live = [record for record in records if not record.is_deleted]
+        prefix_size = _RECORD_LEN.size
+        encoded = [self._encode_record(record, null_bitmap=True) for record in live]
+        if (Page.HEADER_SIZE + sum(map(len, encoded)) + prefix_size * len(encoded)
+                <= Page.PAGE_SIZE):
+            page.header.page_type = _DATA_PAGE_CURRENT
+            prefixed = True
+        else:
+            # 放不下时保持该页原有格式
+            prefixed, null_bitmap = _DATA_PAGE_FORMATS[page.header.page_type]
+            if not null_bitmap:
+                encoded = [self._encode_record(record, null_bitmap=False) for record in live]
+        
         # 清空页面数据（保留页头）
         page.data = bytearray(Page.PAGE_SIZE)
         page.header.record_count = 0
@@ -381,100 +926,135 @@ class TableStorage:
         
         # 重新写入所有未删除的记录
         offset = Page.HEADER_SIZE
-        for record in records:
-            if not record.is_deleted:
-                record_bytes = record.to_bytes(self.columns)
-                if offset + len(record_bytes) <= Page.PAGE_SIZE:
-                    page.write_data(offset, record_bytes)
-                    page.header.record_count += 1
-                    offset += len(record_bytes)
-                    page.header.free_space = Page.PAGE_SIZE - offset
-                else:
-                    break
+        header_size = prefix_size if prefixed else 0
+        for k, record_bytes in enumerate(encoded):
+            size = len(record_bytes)
+            if offset + header_size + size > Page.PAGE_SIZE:
+                # 更新后变长导致放不下：剩余记录交由调用方插入到其他页
+                self._set_free_space(page.page_id, page.header.free_space)
+                return live[k:]
+            if prefixed:
+                page.write_data(offset, _RECORD_LEN.pack(size))
+                offset += prefix_size
+            page.write_data(offset, record_bytes)
+            page.header.record_count += 1
+            offset += size
+            page.header.free_space = Page.PAGE_SIZE - offset
+        
+        self._set_free_space(page.page_id, page.header.free_space)
+        return []
     
     def _matches_condition(self, record: Record, condition: Dict[str, Any]) -> bool:
         """检查记录是否满足条件"""
+        return self._compile_predicate(condition)(record.data)
+    
+    @classmethod
+    def _compile_predicate(cls, condition: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+        """将条件编译为 pred(记录数据) -> bool，循环外只解析一次条件"""
         if not condition:
-            return True
+            return lambda data: True
         
+        test = cls._compile_value_test(condition)
+        if test is None:
+            return lambda data: False
+        
+        column = condition.get('column')
+        return lambda data: test(data.get(column))
+    
+    @staticmethod
+    def _compile_value_test(condition: Dict[str, Any]) -> Optional[Callable[[Any], bool]]:
+        """将条件编译为作用于单个列值的测试函数，条件不完整时返回None"""
         column = condition.get('column')
-        operator = condition.get('operator')
+        op = condition.get('operator')
         value = condition.get('value')
         
-        if not all([column, operator, value is not None]):
-            return False
+        if not all([column, op, value is not None]):
+            return None
         
-        record_value = record.get_value(column)
-        if record_value is None:
-            return False
+        compare = COMPARATORS.get(op)
+        if compare is None:
+            return lambda record_value: False
         
-        # 确保类型匹配
-        try:
-            if isinstance(value, str) and isinstance(record_value, (int, float)):
-                # 如果比较值是字符串，但记录值是数字，尝试转换
-                if value.isdigit():
-                    value = int(value)
-                else:
+        if isinstance(value, str):
+            # 比较值是字符串而记录值是数字时，比较值需为数字串，预先转换
+            try:
+                numeric = int(value) if value.isdigit() else None
+            except ValueError:
+                numeric = None
+            
+            def test(record_value):
+                if record_value is None:
                     return False
-            elif isinstance(value, (int, float)) and isinstance(record_value, str):
-                # 如果比较值是数字，但记录值是字符串，尝试转换
-                if record_value.isdigit():
-                    record_value = int(record_value)
-                else:
+                if isinstance(record_value, (int, float)):
+                    return numeric is not None and compare(record_value, numeric)
+                return compare(record_value, value)
+        elif isinstance(value, (int, float)):
+            # 比较值是数字而记录值是字符串时，记录值需为数字串
+            def test(record_value):
+                if record_value is None:
                     return False
-        except (ValueError, AttributeError):
-            return False
-        
-        if operator == '=':
-            return record_value == value
-        elif operator == '>':
-            return record_value > value
-        elif operator == '<':
-            return record_value < value
-        elif operator == '>=':
-            return record_value >= value
-        elif operator == '<=':
-            return record_value <= value
-        elif operator == '!=':
-            return record_value != value
+                if isinstance(record_value, str):
+                    if not record_value.isdigit():
+                        return False
+                    try:
+                        record_value = int(record_value)
+                    except ValueError:
+                        return False
+                return compare(record_value, value)
+        else:
+            def test(record_value):
+                return record_value is not None and compare(record_value, value)
         
-        return False
+        return test
 
 
 class StorageEngine:
     """存储引擎"""
     
-    def __init__(self, data_file: str = "database.dat"):
+    def __init__(self, data_file: str = "database.dat", flush_every_n: int = 1,
+                 flush_interval: float = 0.0):
         self.page_manager = PageManager(data_file)
         self.cache_manager = CacheManager(self.page_manager)
         self.tables: Dict[str, TableStorage] = {}
         self.index_manager = IndexManager()  # 添加索引管理器
         
+        # 插入后的自动刷盘：每累计flush_every_n条插入刷新一次，批量导入期间关闭
+        self._autoflush = True
+        self.flush_every_n = max(1, flush_every_n)
+        self._dirty_since_flush = 0
+        # 组提交：flush_interval>0时距上次刷盘不足该秒数的插入合并到下一次刷盘
+        self.flush_interval = max(0.0, flush_interval)
+        self._last_flush = time.monotonic()
+        
+        # pg_catalog中登记的表名集合，首次用到时扫描构建；pg_catalog被删改时失效
+        self._catalog_names: Optional[set] = None
+        
         # 加载系统目录表
         self._load_catalog_table()
         
         # 检查pg_catalog表是否有数据，如果有则加载其他表
         try:
             catalog_records = self.select_records("pg_catalog")
-            print(f"StorageEngine初始化：pg_catalog表有{len(catalog_records)}条记录")
+            logger.debug("StorageEngine初始化", catalog_records=len(catalog_records))
             if len(catalog_records) > 0:
                 # 从系统目录加载所有表
                 self._load_all_tables_from_catalog()
         except Exception as e:
-            print(f"检查pg_catalog表失败: {e}")
+            logger.warning(f"检查pg_catalog表失败: {e}")
     
     def create_table(self, table_name: str, columns: List[ColumnInfo]) -> bool:
         """创建表"""
         if table_name in self.tables:
             return False
         
-        print(f"创建表: {table_name}")
+        logger.info("创建表", table=table_name)
         # 创建新表
         table_storage = TableStorage(
             table_name=table_name,
             columns=columns,
             page_manager=self.page_manager,
-            cache_manager=self.cache_manager
+            cache_manager=self.cache_manager,
+            index_manager=self.index_manager
         )
         
         self.tables[table_name] = table_storage
@@ -499,55 +1079,96 @@ class StorageEngine:
         
         # 检查系统目录中是否有该表
         try:
-            catalog_records = self.select_records("pg_catalog")
-            for record in catalog_records:
-                if not record.is_deleted and record.get_value("table_name") == table_name:
-                    return True
+            return table_name in self._get_catalog_names()
         except:
             pass
         
         return False
     
+    def _get_catalog_names(self) -> set:
+        """pg_catalog中登记的表名集合（缓存）"""
+        if self._catalog_names is None:
+            self._catalog_names = {
+                record.get_value("table_name")
+                for record in self.select_records("pg_catalog")
+                if not record.is_deleted
+            }
+        return self._catalog_names
+    
     def insert_record(self, table_name: str, record_data: Dict[str, Any]) -> bool:
         """插入记录"""
         table = self.get_table(table_name)
         if table is None:
-            print(f"表 {table_name} 不存在")
+            logger.warning("表不存在", table=table_name)
             return False
         
         record = Record(data=record_data)
         result = table.insert_record(record)
+        if result and table_name == "pg_catalog" and self._catalog_names is not None:
+            self._catalog_names.add(record_data.get("table_name"))
         
-        print(f"插入记录到表 {table_name}: {result}")
+        logger.debug("插入记录", table=table_name, result=result, record=record_data)
         if result:
-            print(f"记录数据: {record_data}")
-            
             # 维护索引
             self._maintain_indexes_on_insert(table_name, record_data)
         
         # 刷新到磁盘
         if result:
-            self.flush_all()
-            print(f"数据已刷新到磁盘")
+            self._dirty_since_flush += 1
+            if (self._autoflush and self._dirty_since_flush >= self.flush_every_n
+                    and (not self.flush_interval
+                         or time.monotonic() - self._last_flush >= self.flush_interval)):
+                self.flush_all()
         
         return result
     
+    def begin_bulk(self):
+        """开始批量写入：暂停插入后的自动刷盘"""
+        self._autoflush = False
+    
+    def end_bulk(self):
+        """结束批量写入：恢复自动刷盘并一次性刷新"""
+        self._autoflush = True
+        if self._dirty_since_flush:
+            self.flush_all()
+    
+    def count_records(self, table_name: str) -> int:
+        """表中未删除的记录数，表不存在时为0"""
+        table = self.get_table(table_name)
+        return table.live_row_count() if table is not None else 0
+    
+    def bulk_insert(self, table_name: str, rows: List[Dict[str, Any]]) -> int:
+        """批量插入记录，结束时只刷盘一次，返回成功插入的条数"""
+        inserted = 0
+        self.begin_bulk()
+        try:
+            for record_data in rows:
+                if self.insert_record(table_name, record_data):
+                    inserted += 1
+        finally:
+            self.end_bulk()
+        return inserted
+    
     def _maintain_indexes_on_insert(self, table_name: str, record_data: Dict[str, Any]):
         """在插入记录时维护索引"""
-        # 获取表的索引信息
-        table_indexes = self.index_manager.get_index_info(table_name)
+        # 只取索引列名，不构造索引信息字典
+        indexed_columns = self.index_manager.indexed_columns(table_name)
+        table = self.get_table(table_name)
+        if not indexed_columns or table is None or table.last_insert_location is None:
+            return
         
-        for column_name in table_indexes.keys():
+        page_id, offset = table.last_insert_location
+        column_types = table._column_is_int
+        for column_name in indexed_columns:
             if column_name in record_data:
                 key_value = record_data[column_name]
                 if key_value is not None:
-                    # 简化计算：假设记录在最新页的最后位置
-                    latest_page_id = max(table.data_pages) if table.data_pages else 0
-                    offset = 0  # 简化计算
+                    # 索引键与存储的值保持同一类型
+                    key_value = int(key_value) if column_types.get(column_name) else str(key_value)
                     self.index_manager.insert_record(table_name, column_name, 
-                                                   key_value, latest_page_id, offset)
+                                                   key_value, page_id, offset)
     
-    def select_records(self, table_name: str, condition: Optional[Dict[str, Any]] = None) -> List[Record]:
+    def select_records(self, table_name: str, condition: Optional[Dict[str, Any]] = None) -> Sequence[Record]:
         """查询记录"""
         table = self.get_table(table_name)
         if table is None:
@@ -582,87 +1203,87 @@ class StorageEngine:
                     # 尝试从磁盘读取pg_catalog表的数据
                     existing_records = self._try_load_existing_catalog()
                     if existing_records is not None:
-                        print("从磁盘加载现有pg_catalog表")
+                        logger.debug("从磁盘加载现有pg_catalog表")
                         # 创建表结构
                         table_storage = TableStorage(
                             table_name="pg_catalog",
                             columns=columns,
                             page_manager=self.page_manager,
-                            cache_manager=self.cache_manager
+                            cache_manager=self.cache_manager,
+                            index_manager=self.index_manager
                         )
                         self.tables["pg_catalog"] = table_storage
                         # 加载现有数据
                         for record_data in existing_records:
                             table_storage.insert_record(record_data)
                     else:
-                        print("创建新的pg_catalog表")
+                        logger.debug("创建新的pg_catalog表")
                         self.create_table("pg_catalog", columns)
                 except Exception as e:
-                    print(f"尝试加载现有pg_catalog表失败: {e}")
-                    print("创建新的pg_catalog表")
+                    logger.warning(f"尝试加载现有pg_catalog表失败: {e}")
+                    logger.debug("创建新的pg_catalog表")
                     self.create_table("pg_catalog", columns)
             else:
-                print("pg_catalog表已存在")
+                logger.debug("pg_catalog表已存在")
         except Exception as e:
-            print(f"加载系统目录表失败: {e}")
+            logger.error(f"加载系统目录表失败: {e}")
     
     def _try_load_existing_catalog(self):
         """尝试从磁盘加载现有的pg_catalog表数据"""
         try:
             # 检查磁盘文件是否存在
             if not os.path.exists(self.page_manager.data_file):
-                print("数据文件不存在")
+                logger.debug("数据文件不存在")
                 return None
             
             # 检查文件大小
             file_size = os.path.getsize(self.page_manager.data_file)
             if file_size < 16:
-                print("数据文件太小")
+                logger.debug("数据文件太小")
                 return None
             
-            print(f"数据文件存在，大小: {file_size} 字节")
+            logger.debug("数据文件存在", size=file_size)
             
-            # 直接读取磁盘文件并解析pg_catalog表的数据
-            with open(self.page_manager.data_file, 'rb') as f:
-                # 读取文件头
-                header_data = f.read(16)
-                if len(header_data) < 16:
-                    return None
+            # 直接映射磁盘文件并解析pg_catalog表的数据（先写出页管理器的写回缓冲）
+            self.page_manager.drain_write_back()
+            with open(self.page_manager.data_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                mapped_size = len(mm)
                 
                 # 解析文件头
-                page_count = int.from_bytes(header_data[8:16], byteorder='little')
-                print(f"文件中有 {page_count} 页")
+                page_count = int.from_bytes(mm[8:16], byteorder='little')
+                logger.debug("数据文件页数", page_count=page_count)
                 
                 if page_count == 0:
                     return None
                 
-                # 尝试读取所有页面
+                # 尝试读取所有页面：直接在映射上按偏移访问，不再逐页seek/read复制整页
                 records = []
                 for page_id in range(page_count):
-                    f.seek(16 + page_id * 4096)  # 跳过文件头
-                    page_data = f.read(4096)
-                    if len(page_data) < 4096:
+                    base = 16 + page_id * 4096  # 跳过文件头
+                    page_end = base + 4096
+                    if page_end > mapped_size:
                         continue
                     
                     # 解析页面头
-                    page_type = page_data[0:16].decode('utf-8').rstrip('\x00')
+                    page_type = mm[base:base + 16].decode('utf-8').rstrip('\x00')
                     if page_type != 'data':
                         continue
                     
-                    record_count = int.from_bytes(page_data[16:20], byteorder='little')
-                    print(f"页 {page_id} 有 {record_count} 条记录")
+                    record_count = int.from_bytes(mm[base + 16:base + 20], byteorder='little')
+                    logger.debug("页记录数", page_id=page_id, record_count=record_count)
                     
                     if record_count == 0:
                         continue
                     
                     # 解析记录
-                    offset = 48  # 页面头大小
+                    offset = base + 48  # 页面头大小
                     for i in range(record_count):
-                        if offset >= len(page_data):
+                        if offset >= page_end:
                             break
                         
                         # 读取删除标志
-                        is_deleted = page_data[offset] == 1
+                        is_deleted = mm[offset] == 1
                         offset += 1
                         
                         if not is_deleted:
@@ -670,19 +1291,16 @@ class StorageEngine:
                             # 尝试解析记录长度
                             record_size = 0
                             # 查找记录结束标志（简化版本）
-                            for j in range(offset, min(offset + 1000, len(page_data))):
-                                if page_data[j] == 0:  # 找到空字节
-                                    record_size = j - offset
-                                    break
+                            end = mm.find(b'\x00', offset, min(offset + 1000, page_end))
+                            if end != -1:  # 找到空字节
+                                record_size = end - offset
                             
                             if record_size == 0:
                                 record_size = 200  # 默认大小
                             
-                            if offset + record_size > len(page_data):
+                            if offset + record_size > page_end:
                                 break
                             
-                            record_data = page_data[offset:offset + record_size]
-                            
                             # 尝试解析记录
                             try:
                                 # 这里需要根据实际的记录格式来解析
@@ -693,17 +1311,17 @@ class StorageEngine:
                                     "created_at": "2025-09-10T08:45:00.000000",
                                     "page_count": 0
                                 })
-                                print(f"找到记录 {i}，大小: {record_size}")
+                                logger.debug("找到记录", index=i, size=record_size)
                             except:
                                 pass
                             
                             offset += record_size
                 
-                print(f"从磁盘加载到 {len(records)} 条记录")
+                logger.debug("从磁盘加载目录记录", count=len(records))
                 return records if records else None
             
         except Exception as e:
-            print(f"尝试加载现有目录失败: {e}")
+            logger.warning(f"尝试加载现有目录失败: {e}")
             return None
     
     def _load_all_tables_from_catalog(self):
@@ -711,20 +1329,20 @@ class StorageEngine:
         try:
             # 确保pg_catalog表存在
             if "pg_catalog" not in self.tables:
-                print("pg_catalog表不存在，无法加载其他表")
+                logger.warning("pg_catalog表不存在，无法加载其他表")
                 return
             
             # 从pg_catalog表加载表信息
             catalog_records = self.select_records("pg_catalog")
-            print(f"从磁盘加载pg_catalog表，记录数: {len(catalog_records)}")
+            logger.debug("从磁盘加载pg_catalog表", count=len(catalog_records))
             
             # 打印所有记录
             for i, record in enumerate(catalog_records):
-                print(f"  记录 {i}: {record.data}")
+                logger.debug("pg_catalog记录", index=i, data=record.data)
             
             # 如果没有记录，直接返回
             if len(catalog_records) == 0:
-                print("pg_catalog表没有记录，无法加载其他表")
+                logger.debug("pg_catalog表没有记录，无法加载其他表")
                 return
             
             for record in catalog_records:
@@ -736,29 +1354,25 @@ class StorageEngine:
                 
                 if table_name and table_name != "pg_catalog" and column_info_json:
                     try:
-                        import json
-                        columns_data = json.loads(column_info_json)
-                        columns = []
-                        for col_data in columns_data:
-                            columns.append(ColumnInfo(
-                                name=col_data['name'],
-                                data_type=DataType(col_data['type'])
-                            ))
+                        from storage.catalog_codec import decode_column_info
+                        columns = decode_column_info(column_info_json)
                         
                         # 创建表存储
                         if table_name not in self.tables:
                             self.create_table(table_name, columns)
-                            print(f"从磁盘加载表: {table_name}")
+                            logger.info("从磁盘加载表", table=table_name)
                     except Exception as e:
-                        print(f"加载表 {table_name} 失败: {e}")
+                        logger.error(f"加载表 {table_name} 失败: {e}")
         except Exception as e:
-            print(f"从系统目录加载表失败: {e}")
+            logger.error(f"从系统目录加载表失败: {e}")
     
     def delete_records(self, table_name: str, condition: Optional[Dict[str, Any]] = None) -> int:
         """删除记录"""
         table = self.get_table(table_name)
         if table is None:
             return 0
+        if table_name == "pg_catalog":
+            self._catalog_names = None
         
         if condition:
             return table.delete_records(condition)
@@ -772,12 +1386,25 @@ class StorageEngine:
         table = self.get_table(table_name)
         if table is None:
             return 0
+        if table_name == "pg_catalog":
+            self._catalog_names = None
         
+        relocated = table.relocated_count
         if condition:
-            return table.update_records(update_data, condition)
+            updated_count = table.update_records(update_data, condition)
         else:
             # 更新所有记录
-            return table.update_records(update_data, {})
+            updated_count = table.update_records(update_data, {})
+        
+        # 被更新的列上的索引已过期；有记录被挪到其他页时，该表所有索引都需重建
+        if updated_count:
+            moved = table.relocated_count != relocated
+            stale = [column_name for column_name in self.index_manager.indexed_columns(table_name)
+                     if moved or column_name in update_data]
+            if stale:
+                self._rebuild_indexes(table_name, stale)
+        
+        return updated_count
     
     def delete_record(self, table_name: str, condition: Dict[str, Any]) -> bool:
         """删除记录（简化实现）"""
@@ -792,6 +1419,8 @@ class StorageEngine:
         """刷新所有数据到磁盘"""
         self.cache_manager.flush_all()
         self.page_manager.flush_all()
+        self._dirty_since_flush = 0
+        self._last_flush = time.monotonic()
     
     def get_stats(self) -> Dict[str, Any]:
         """获取存储统计信息"""
@@ -822,7 +1451,8 @@ class StorageEngine:
         # 创建索引
         success = self.index_manager.create_index(table_name, column_name, index_type)
         if success:
-            print(f"为表 {table_name} 的列 {column_name} 创建了 {index_type.value} 索引")
+            logger.info("创建索引", table=table_name, column=column_name,
+                        type=index_type.value)
             
             # 为现有数据建立索引
             self._build_index_for_existing_data(table_name, column_name)
@@ -833,30 +1463,28 @@ class StorageEngine:
         """删除索引"""
         return self.index_manager.drop_index(table_name, column_name)
     
+    def _rebuild_indexes(self, table_name: str, column_names: List[str]):
+        """按当前数据重建多个索引，所有列的条目在同一次扫描中收集"""
+        table = self.get_table(table_name)
+        index_info = self.index_manager.get_index_info(table_name)
+        for column_name in column_names:
+            index_type = IndexType(index_info[column_name]["type"])
+            self.index_manager.drop_index(table_name, column_name)
+            self.index_manager.create_index(table_name, column_name, index_type)
+        if table is None:
+            return
+        for column_name, entries in table.columns_locations(column_names).items():
+            self.index_manager.bulk_load(table_name, column_name, entries)
+    
     def _build_index_for_existing_data(self, table_name: str, column_name: str):
         """为现有数据建立索引"""
         table = self.get_table(table_name)
         if not table:
             return
         
-        # 获取所有记录
-        all_records = table.get_all_records()
-        
-        # 为每条记录建立索引
-        for page_id in table.data_pages:
-            page = self.cache_manager.get_page(page_id)
-            if page is None:
-                continue
-            
-            page_records = table._extract_records_from_page(page)
-            for i, record in enumerate(page_records):
-                if not record.is_deleted:
-                    key_value = record.get_value(column_name)
-                    if key_value is not None:
-                        # 计算记录在页中的偏移量
-                        offset = 48 + i * 100  # 简化计算
-                        self.index_manager.insert_record(table_name, column_name, 
-                                                       key_value, page_id, offset)
+        # 一次扫描收集整列的键和位置，排序后批量构建索引
+        self.index_manager.bulk_load(table_name, column_name,
+                                     table.column_locations(column_name))
     
     def get_index_info(self, table_name: str) -> Dict[str, Any]:
         """获取表的索引信息"""
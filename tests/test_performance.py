@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+性能监控模块测试
+运行：python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+from unittest import mock
+
+from utils import performance
+from utils.performance import MetricType, PerformanceMetric, PerformanceMonitor
+
+
+def _metric(operation: str, duration: float) -> PerformanceMetric:
+    return PerformanceMetric(MetricType.SQL_EXECUTION, operation, duration, time.time())
+
+
+class TestMetricHistory(unittest.TestCase):
+    """历史窗口的保留条数与分片数、写入线程数无关"""
+
+    def setUp(self):
+        # 固定为8个分片，单核机器上同样覆盖多分片的情况
+        patcher = mock.patch.object(performance, '_shard_count', return_value=8)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_thread_keeps_max_history(self):
+        monitor = PerformanceMonitor(max_history=1000)
+        for i in range(1000):
+            monitor.record_metric(_metric("SELECT", 0.001))
+
+        self.assertEqual(len(monitor.metrics), 1000)
+        self.assertEqual(monitor.get_metrics_summary()["count"], 1000)
+        self.assertEqual(monitor.get_top_operations()[0]["count"], 1000)
+
+    def test_single_thread_drops_oldest(self):
+        monitor = PerformanceMonitor(max_history=100)
+        for i in range(250):
+            monitor.record_metric(_metric(f"op{i}", float(i)))
+
+        metrics = monitor.metrics
+        self.assertEqual([m.operation for m in metrics], [f"op{i}" for i in range(150, 250)])
+        summary = monitor.get_metrics_summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["min_duration"], 150.0)
+        self.assertEqual(summary["max_duration"], 249.0)
+
+    def test_threads_share_global_bound(self):
+        monitor = PerformanceMonitor(max_history=500)
+
+        def record(name):
+            for _ in range(400):
+                monitor.record_metric(_metric(name, 0.001))
+
+        threads = [threading.Thread(target=record, args=(f"op{k}",)) for k in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(monitor.metrics), 500)
+        self.assertEqual(monitor.get_metrics_summary()["count"], 500)
+        self.assertEqual(sum(op["count"] for op in monitor.get_top_operations()), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,8 +3,12 @@
 数据库系统日志模块
 提供统一的日志记录功能
 """
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import Enum
@@ -19,6 +23,48 @@ class LogLevel(Enum):
     CRITICAL = "CRITICAL"
 
 
+_SQL_SUCCESS = "SQL执行 SUCCESS"
+_SQL_FAILED = "SQL执行 FAILED"
+
+
+class _FieldsFormatter(logging.Formatter):
+    """把随记录附带的结构化字段拼接到消息后，字段只在真正输出时才格式化
+    
+    输出格式固定为"时间 - 名称 - 级别 - 消息"：时间串每秒只生成一次，
+    "名称 - 级别"前缀按(名称, 级别)缓存；带异常信息的记录走标准格式化。
+    """
+    
+    def __init__(self, datefmt: str = '%Y-%m-%d %H:%M:%S'):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                         datefmt=datefmt)
+        self._prefixes: Dict[tuple, str] = {}
+        self._second = None
+        self._stamp = ""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, 'db_fields', None)
+        if fields:
+            record.msg = f"{record.getMessage()} | {fields}"
+            record.args = None
+            record.db_fields = None
+        if record.exc_info or record.exc_text or record.stack_info:
+            return super().format(record)
+        
+        second = int(record.created)
+        if second != self._second:
+            self._stamp = time.strftime(self.datefmt, self.converter(record.created))
+            self._second = second
+        key = (record.name, record.levelname)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = self._prefixes[key] = f" - {record.name} - {record.levelname} - "
+        message = record.msg if not record.args else record.getMessage()
+        if not isinstance(message, str):
+            message = str(message)
+        record.message = message
+        return f"{self._stamp}{prefix}{message}"
+
+
 class DatabaseLogger:
     """数据库系统日志记录器"""
     
@@ -31,10 +77,7 @@ class DatabaseLogger:
         # 避免重复添加处理器
         if not self.logger.handlers:
             # 创建格式器
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
+            formatter = _FieldsFormatter(datefmt='%Y-%m-%d %H:%M:%S')
             
             # 控制台处理器
             # console_handler = logging.StreamHandler()
@@ -42,60 +85,70 @@ class DatabaseLogger:
             # console_handler.setFormatter(formatter)
             # self.logger.addHandler(console_handler)
             
-            # 文件处理器
+            # 文件处理器：调用方只把记录放入队列，由后台线程写文件
             if log_file:
                 file_handler = logging.FileHandler(log_file, encoding='utf-8')
                 file_handler.setLevel(logging.DEBUG)
                 file_handler.setFormatter(formatter)
-                self.logger.addHandler(file_handler)
+                log_queue = queue.SimpleQueue()
+                self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+                listener = logging.handlers.QueueListener(log_queue, file_handler,
+                                                          respect_handler_level=True)
+                listener.start()
+                # 退出时写完队列中剩余的记录
+                atexit.register(listener.stop)
     
     def debug(self, message: str, **kwargs):
         """记录调试信息"""
-        self.logger.debug(self._format_message(message, **kwargs))
+        self._log(logging.DEBUG, message, kwargs)
     
     def info(self, message: str, **kwargs):
         """记录信息"""
-        self.logger.info(self._format_message(message, **kwargs))
+        self._log(logging.INFO, message, kwargs)
     
     def warning(self, message: str, **kwargs):
         """记录警告"""
-        self.logger.warning(self._format_message(message, **kwargs))
+        self._log(logging.WARNING, message, kwargs)
     
     def error(self, message: str, **kwargs):
         """记录错误"""
-        self.logger.error(self._format_message(message, **kwargs))
+        self._log(logging.ERROR, message, kwargs)
     
     def critical(self, message: str, **kwargs):
         """记录严重错误"""
-        self.logger.critical(self._format_message(message, **kwargs))
+        self._log(logging.CRITICAL, message, kwargs)
     
-    def _format_message(self, message: str, **kwargs) -> str:
-        """格式化消息"""
-        if kwargs:
-            return f"{message} | {kwargs}"
-        return message
+    def _log(self, level: int, message: str, fields: Dict[str, Any], *args):
+        """级别未开启时直接返回；字段随记录传递，由格式器在输出时拼接"""
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message, *args,
+                            extra={'db_fields': fields} if fields else None)
     
     def log_sql_execution(self, sql: str, success: bool, duration: float, 
                          rows_affected: int = 0, error: Optional[str] = None):
-        """记录SQL执行信息"""
-        status = "SUCCESS" if success else "FAILED"
-        self.info(f"SQL执行 {status}", 
-                 sql=sql[:100] + "..." if len(sql) > 100 else sql,
-                 duration=f"{duration:.3f}s",
-                 rows_affected=rows_affected,
-                 error=error)
+        """记录SQL执行信息（每条SQL都会调用，INFO未开启时直接返回）"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self._log(logging.INFO, _SQL_SUCCESS if success else _SQL_FAILED,
+                  {'sql': sql if len(sql) <= 100 else sql[:100] + "...",
+                   'duration': f"{duration:.3f}s",
+                   'rows_affected': rows_affected,
+                   'error': error})
     
     def log_cache_operation(self, operation: str, page_id: int, hit: bool):
-        """记录缓存操作"""
-        self.debug(f"缓存{operation}", page_id=page_id, hit=hit)
+        """记录缓存操作（每次取页都会调用，DEBUG未开启时不构造任何参数）"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self._log(logging.DEBUG, "缓存%s", {'page_id': page_id, 'hit': hit}, operation)
     
     def log_storage_operation(self, operation: str, table_name: str, 
                             record_count: int = 0, page_count: int = 0):
         """记录存储操作"""
-        self.debug(f"存储{operation}", 
-                  table_name=table_name, 
-                  record_count=record_count,
-                  page_count=page_count)
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self._log(logging.DEBUG, "存储%s",
+                  {'table_name': table_name, 'record_count': record_count,
+                   'page_count': page_count}, operation)
     
     def log_performance(self, operation: str, duration: float, 
                        details: Optional[Dict[str, Any]] = None):
@@ -5,71 +5,174 @@ SQL自动补全器
 """
 
 import re
-from typing import List, Set, Optional, Tuple
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class _PrefixIndex:
+    """按大写形式排序的候选词表，前缀匹配用二分定位后顺序取出"""
+    
+    __slots__ = ('keys', 'values')
+    
+    def __init__(self, words: Iterable[str], template: str = "{}"):
+        pairs = sorted((word.upper(), template.format(word)) for word in dict.fromkeys(words))
+        self.keys = tuple(key for key, _ in pairs)
+        self.values = tuple(value for _, value in pairs)
+    
+    def match(self, prefix: str) -> List[str]:
+        """返回大写形式以prefix开头的候选词，prefix须已转为大写"""
+        keys = self.keys
+        start = i = bisect_left(keys, prefix)
+        end = len(keys)
+        while i < end and keys[i].startswith(prefix):
+            i += 1
+        return list(self.values[start:i])
+
+
+# 子句关键字 -> 进入的上下文（None表示离开当前子句，按默认情况补全）
+_CLAUSE_WORDS = {
+    'SELECT': 'in_select_clause',
+    'FROM': 'in_from_clause',
+    'WHERE': 'in_where_clause',
+    'HAVING': 'in_where_clause',
+    'GROUP': None,
+    'ORDER': None,
+    'LIMIT': None,
+    'INSERT': None,
+    'UPDATE': None,
+    'DELETE': None,
+    'CREATE': None,
+}
+
+# 扫描时关心的记号：单词、引号字符串（可能尚未闭合）、语句分隔符，其余字符一并跳过
+_TOKEN_RE = re.compile(r"(\w+)|('[^']*'?)|;")
+
+# advance() 需要处理的单词，其余单词只记为前一个单词
+_SCAN_WORDS = frozenset(_CLAUSE_WORDS) | {'TABLE', 'INTO', 'VALUES', 'SET'}
+
+_CONTEXT_KEYS = ('in_select_clause', 'in_from_clause', 'in_where_clause',
+                 'in_create_table', 'in_insert_values', 'in_update_set')
+
+
+@dataclass
+class _ScanState:
+    """上下文扫描状态：pos之前的文本已处理完，末尾未完成的单词不计入"""
+    pos: int = 0
+    clause: Optional[str] = None
+    in_quote: bool = False
+    prev_word: str = ""
+    seen_insert: bool = False
+    seen_update: bool = False
+    
+    def advance(self, word: str):
+        """读入一个完整的大写单词，更新当前子句"""
+        prev, self.prev_word = self.prev_word, word
+        if word in _CLAUSE_WORDS:
+            self.clause = _CLAUSE_WORDS[word]
+            if word == 'UPDATE':
+                self.seen_update = True
+        elif word == 'TABLE' and prev == 'CREATE':
+            self.clause = 'in_create_table'
+        elif word == 'INTO' and prev == 'INSERT':
+            self.seen_insert = True
+        elif word == 'VALUES' and self.seen_insert:
+            self.clause = 'in_insert_values'
+        elif word == 'SET' and self.seen_update:
+            self.clause = 'in_update_set'
+    
+    def end_statement(self):
+        """分号结束一条语句，之后从头开始"""
+        self.clause = None
+        self.prev_word = ""
+        self.seen_insert = self.seen_update = False
 
 
 class SQLCompleter:
     """SQL自动补全器"""
     
+    # SQL关键字（按使用频率排序，重复项在类加载时去掉）
+    KEYWORDS = tuple(dict.fromkeys((
+        # 查询相关
+        'SELECT', 'FROM', 'WHERE', 'GROUP', 'BY', 'ORDER', 'HAVING',
+        'DISTINCT', 'TOP', 'LIMIT', 'OFFSET',
+        
+        # 数据操作
+        'INSERT', 'INTO', 'VALUES', 'UPDATE', 'SET', 'DELETE',
+        
+        # 表操作
+        'CREATE', 'TABLE', 'ALTER', 'DROP', 'TRUNCATE',
+        'INDEX', 'UNIQUE', 'PRIMARY', 'KEY', 'FOREIGN',
+        
+        # 数据类型
+        'INT', 'INTEGER', 'VARCHAR', 'CHAR', 'TEXT', 'DECIMAL',
+        'FLOAT', 'DOUBLE', 'DATE', 'TIME', 'DATETIME', 'TIMESTAMP',
+        'BOOLEAN', 'BOOL',
+        
+        # 聚合函数
+        'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'STDDEV', 'VARIANCE',
+        
+        # 字符串函数
+        'CONCAT', 'SUBSTRING', 'LENGTH', 'UPPER', 'LOWER', 'TRIM',
+        'REPLACE', 'LEFT', 'RIGHT',
+        
+        # 日期函数
+        'NOW', 'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP',
+        'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND',
+        
+        # 逻辑操作符
+        'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'IS',
+        
+        # 比较操作符
+        '=', '!=', '<>', '<', '>', '<=', '>=',
+        
+        # 排序
+        'ASC', 'DESC',
+        
+        # 连接
+        'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'OUTER', 'ON',
+        
+        # 别名
+        'AS',
+        
+        # 其他
+        'NULL', 'DEFAULT', 'AUTO_INCREMENT', 'UNIQUE', 'NOT', 'NULL',
+        'CHECK', 'CONSTRAINT', 'REFERENCES', 'CASCADE', 'RESTRICT'
+    )))
+    
+    # 内置函数列表
+    FUNCTIONS = (
+        'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'STDDEV', 'VARIANCE',
+        'CONCAT', 'SUBSTRING', 'LENGTH', 'UPPER', 'LOWER', 'TRIM',
+        'REPLACE', 'LEFT', 'RIGHT', 'NOW', 'CURRENT_DATE', 'CURRENT_TIME',
+        'CURRENT_TIMESTAMP', 'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND'
+    )
+    
+    OPERATORS = ('=', '!=', '<>', '<', '>', '<=', '>=', 'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'IS')
+    
+    # 各上下文中附加建议的关键字
+    FROM_KEYWORDS = ('JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'OUTER')
+    WHERE_KEYWORDS = ('AND', 'OR', 'NOT', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'IS')
+    TYPE_KEYWORDS = ('INT', 'VARCHAR', 'CHAR', 'TEXT', 'DECIMAL', 'FLOAT', 'DOUBLE', 'DATE', 'TIME', 'DATETIME', 'TIMESTAMP', 'BOOLEAN')
+    CONSTRAINT_KEYWORDS = ('PRIMARY', 'KEY', 'UNIQUE', 'NOT', 'NULL', 'DEFAULT', 'AUTO_INCREMENT')
+    SELECT_KEYWORDS = ('DISTINCT', 'TOP', 'LIMIT')
+    
+    # 候选词按大写排序的索引在类加载时建好，所有实例共享，每次补全只做二分查找
+    _KEYWORD_INDEX = _PrefixIndex(KEYWORDS)
+    _FUNCTION_INDEX = _PrefixIndex(FUNCTIONS, "{}()")
+    _OPERATOR_INDEX = _PrefixIndex(OPERATORS)
+    _SUBSET_INDEXES: Dict[Tuple[str, ...], _PrefixIndex] = {
+        words: _PrefixIndex(words)
+        for words in (FROM_KEYWORDS, WHERE_KEYWORDS, TYPE_KEYWORDS, CONSTRAINT_KEYWORDS, SELECT_KEYWORDS)
+    }
+    
     def __init__(self, database=None):
         self.database = database
-        
-        # SQL关键字列表（按使用频率排序）
-        self.keywords = [
-            # 查询相关
-            'SELECT', 'FROM', 'WHERE', 'GROUP', 'BY', 'ORDER', 'HAVING',
-            'DISTINCT', 'TOP', 'LIMIT', 'OFFSET',
-            
-            # 数据操作
-            'INSERT', 'INTO', 'VALUES', 'UPDATE', 'SET', 'DELETE',
-            
-            # 表操作
-            'CREATE', 'TABLE', 'ALTER', 'DROP', 'TRUNCATE',
-            'INDEX', 'UNIQUE', 'PRIMARY', 'KEY', 'FOREIGN',
-            
-            # 数据类型
-            'INT', 'INTEGER', 'VARCHAR', 'CHAR', 'TEXT', 'DECIMAL',
-            'FLOAT', 'DOUBLE', 'DATE', 'TIME', 'DATETIME', 'TIMESTAMP',
-            'BOOLEAN', 'BOOL',
-            
-            # 聚合函数
-            'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'STDDEV', 'VARIANCE',
-            
-            # 字符串函数
-            'CONCAT', 'SUBSTRING', 'LENGTH', 'UPPER', 'LOWER', 'TRIM',
-            'REPLACE', 'LEFT', 'RIGHT',
-            
-            # 日期函数
-            'NOW', 'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP',
-            'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND',
-            
-            # 逻辑操作符
-            'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'IS',
-            
-            # 比较操作符
-            '=', '!=', '<>', '<', '>', '<=', '>=',
-            
-            # 排序
-            'ASC', 'DESC',
-            
-            # 连接
-            'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'OUTER', 'ON',
-            
-            # 别名
-            'AS',
-            
-            # 其他
-            'NULL', 'DEFAULT', 'AUTO_INCREMENT', 'UNIQUE', 'NOT', 'NULL',
-            'CHECK', 'CONSTRAINT', 'REFERENCES', 'CASCADE', 'RESTRICT'
-        ]
-        
-        # 内置函数列表
-        self.functions = [
-            'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'STDDEV', 'VARIANCE',
-            'CONCAT', 'SUBSTRING', 'LENGTH', 'UPPER', 'LOWER', 'TRIM',
-            'REPLACE', 'LEFT', 'RIGHT', 'NOW', 'CURRENT_DATE', 'CURRENT_TIME',
-            'CURRENT_TIMESTAMP', 'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND'
-        ]
+        # 表名索引，数据库的schema_version变化后重建；数据库不提供版本号时每次重新获取
+        self._table_index: Optional[_PrefixIndex] = None
+        self._tables_version: Optional[int] = None
+        # 上一次扫描过的文本前缀及扫描状态；输入只在末尾追加时从断点继续扫描
+        self._scan_cache: Optional[Tuple[str, _ScanState]] = None
     
     def get_completions(self, text: str) -> List[str]:
         """
@@ -85,34 +188,9 @@ class SQLCompleter:
         current_word = self._get_current_word(text)
         current_word_upper = current_word.upper()
         
-        # 分析上下文
-        context = self._analyze_context(text)
-        
-        completions = []
-        
-        # 根据上下文提供不同的补全建议
-        if context['in_from_clause']:
-            # 在FROM子句中，优先建议表名
-            completions.extend(self._get_table_completions(current_word_upper))
-            completions.extend(self._get_keyword_completions(current_word_upper, ['JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'OUTER']))
-        elif context['in_where_clause']:
-            # 在WHERE子句中，建议列名、操作符和函数
-            completions.extend(self._get_column_completions(current_word_upper))
-            completions.extend(self._get_operator_completions(current_word_upper))
-            completions.extend(self._get_function_completions(current_word_upper))
-            completions.extend(self._get_keyword_completions(current_word_upper, ['AND', 'OR', 'NOT', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'IS']))
-        elif context['in_create_table']:
-            # 在CREATE TABLE中，建议数据类型和约束
-            completions.extend(self._get_keyword_completions(current_word_upper, ['INT', 'VARCHAR', 'CHAR', 'TEXT', 'DECIMAL', 'FLOAT', 'DOUBLE', 'DATE', 'TIME', 'DATETIME', 'TIMESTAMP', 'BOOLEAN']))
-            completions.extend(self._get_keyword_completions(current_word_upper, ['PRIMARY', 'KEY', 'UNIQUE', 'NOT', 'NULL', 'DEFAULT', 'AUTO_INCREMENT']))
-        elif context['in_select_clause']:
-            # 在SELECT子句中，优先建议列名和函数
-            completions.extend(self._get_column_completions(current_word_upper))
-            completions.extend(self._get_function_completions(current_word_upper))
-            completions.extend(self._get_keyword_completions(current_word_upper, ['DISTINCT', 'TOP', 'LIMIT']))
-        else:
-            # 默认情况下，建议所有关键字
-            completions.extend(self._get_keyword_completions(current_word_upper))
+        # 按扫描出的子句查表选择补全方式
+        complete = self._CLAUSE_COMPLETERS.get(self._scan_clause(text), SQLCompleter._complete_default)
+        completions = complete(self, current_word_upper)
         
         # 去重并排序
         completions = list(set(completions))
@@ -121,67 +199,124 @@ class SQLCompleter:
         return completions
     
     def _get_current_word(self, text: str) -> str:
-        """获取当前光标位置的单词"""
-        # 找到最后一个单词
-        words = re.findall(r'\b\w+\b', text)
-        return words[-1] if words else ""
+        """获取光标处（文本末尾）正在输入的单词，末尾是空白或符号时为空串"""
+        i = len(text)
+        while i > 0 and (text[i - 1].isalnum() or text[i - 1] == '_'):
+            i -= 1
+        return text[i:]
     
     def _analyze_context(self, text: str) -> dict:
         """分析当前上下文"""
-        text_upper = text.upper()
-        
-        context = {
-            'in_select_clause': False,
-            'in_from_clause': False,
-            'in_where_clause': False,
-            'in_create_table': False,
-            'in_insert_values': False,
-            'in_update_set': False
-        }
-        
-        # 简单的上下文分析
-        if 'CREATE TABLE' in text_upper:
-            context['in_create_table'] = True
-        elif 'INSERT INTO' in text_upper and 'VALUES' in text_upper:
-            context['in_insert_values'] = True
-        elif 'UPDATE' in text_upper and 'SET' in text_upper:
-            context['in_update_set'] = True
-        elif 'WHERE' in text_upper:
-            context['in_where_clause'] = True
-        elif 'FROM' in text_upper:
-            context['in_from_clause'] = True
-        elif 'SELECT' in text_upper:
-            context['in_select_clause'] = True
-        
+        context = dict.fromkeys(_CONTEXT_KEYS, False)
+        clause = self._scan_clause(text)
+        if clause is not None:
+            context[clause] = True
         return context
     
-    def _get_keyword_completions(self, current_word: str, keywords: List[str] = None) -> List[str]:
+    def _scan_clause(self, text: str) -> Optional[str]:
+        """逐词扫描文本确定光标所在的子句；引号内的内容不参与判断"""
+        cached = self._scan_cache
+        if cached is not None and text.startswith(cached[0]):
+            # 状态只对应缓存的前缀，新文本是其延伸时直接在原状态上继续
+            state = cached[1]
+        else:
+            state = _ScanState()
+        
+        i, n = state.pos, len(text)
+        if state.in_quote:
+            j = text.find("'", i)
+            if j < 0:
+                i = n
+            else:
+                state.in_quote = False
+                i = j + 1
+        for m in _TOKEN_RE.finditer(text, i):
+            word, quoted = m.groups()
+            i = m.end()
+            if word:
+                if i == n:
+                    # 正在输入的单词，等它结束后再处理
+                    i = m.start()
+                    break
+                word = word.upper()
+                if word in _SCAN_WORDS:
+                    state.advance(word)
+                else:
+                    state.prev_word = word
+            elif quoted:
+                if len(quoted) == 1 or quoted[-1] != "'":
+                    state.in_quote = True
+            else:
+                state.end_statement()
+        else:
+            i = n
+        
+        state.pos = i
+        self._scan_cache = (text[:i], state)
+        return state.clause
+    
+    def _complete_from(self, current_word: str) -> List[str]:
+        """FROM子句：优先建议表名"""
+        return (self._get_table_completions(current_word)
+                + self._get_keyword_completions(current_word, self.FROM_KEYWORDS))
+    
+    def _complete_where(self, current_word: str) -> List[str]:
+        """WHERE子句：建议列名、操作符和函数"""
+        return (self._get_column_completions(current_word)
+                + self._get_operator_completions(current_word)
+                + self._get_function_completions(current_word)
+                + self._get_keyword_completions(current_word, self.WHERE_KEYWORDS))
+    
+    def _complete_create_table(self, current_word: str) -> List[str]:
+        """CREATE TABLE：建议数据类型和约束"""
+        return (self._get_keyword_completions(current_word, self.TYPE_KEYWORDS)
+                + self._get_keyword_completions(current_word, self.CONSTRAINT_KEYWORDS))
+    
+    def _complete_select(self, current_word: str) -> List[str]:
+        """SELECT子句：优先建议列名和函数"""
+        return (self._get_column_completions(current_word)
+                + self._get_function_completions(current_word)
+                + self._get_keyword_completions(current_word, self.SELECT_KEYWORDS))
+    
+    def _complete_default(self, current_word: str) -> List[str]:
+        """默认情况下，建议所有关键字"""
+        return self._get_keyword_completions(current_word)
+    
+    _CLAUSE_COMPLETERS = {
+        'in_from_clause': _complete_from,
+        'in_where_clause': _complete_where,
+        'in_create_table': _complete_create_table,
+        'in_select_clause': _complete_select,
+    }
+    
+    def _get_keyword_completions(self, current_word: str, keywords: Optional[Tuple[str, ...]] = None) -> List[str]:
         """获取关键字补全建议"""
         if keywords is None:
-            keywords = self.keywords
-        
-        completions = []
-        for keyword in keywords:
-            if keyword.upper().startswith(current_word):
-                completions.append(keyword)
+            return self._KEYWORD_INDEX.match(current_word)
         
-        return completions
+        key = tuple(keywords)
+        index = self._SUBSET_INDEXES.get(key)
+        if index is None:
+            index = self._SUBSET_INDEXES[key] = _PrefixIndex(key)
+        return index.match(current_word)
     
     def _get_table_completions(self, current_word: str) -> List[str]:
         """获取表名补全建议"""
-        completions = []
-        
         if self.database:
             try:
-                # 获取数据库中的表名
-                tables = self.database.get_tables()
-                for table in tables:
-                    if table.upper().startswith(current_word):
-                        completions.append(table)
+                return self._get_table_index().match(current_word)
             except:
                 pass
         
-        return completions
+        return []
+    
+    def _get_table_index(self) -> _PrefixIndex:
+        """数据库表名的前缀索引，表集合未变化时复用"""
+        version = getattr(self.database, 'schema_version', None)
+        if self._table_index is None or version is None or version != self._tables_version:
+            self._table_index = _PrefixIndex(self.database.get_tables())
+            self._tables_version = version
+        return self._table_index
     
     def _get_column_completions(self, current_word: str) -> List[str]:
         """获取列名补全建议"""
@@ -190,7 +325,7 @@ class SQLCompleter:
         if self.database:
             try:
                 # 获取所有表的列名
-                tables = self.database.get_tables()
+                tables = self._get_table_index().values
                 for table in tables:
                     try:
                         # 这里需要根据实际的数据库接口来获取列名
@@ -205,24 +340,11 @@ class SQLCompleter:
     
     def _get_function_completions(self, current_word: str) -> List[str]:
         """获取函数补全建议"""
-        completions = []
-        
-        for func in self.functions:
-            if func.upper().startswith(current_word):
-                completions.append(f"{func}()")
-        
-        return completions
+        return self._FUNCTION_INDEX.match(current_word)
     
     def _get_operator_completions(self, current_word: str) -> List[str]:
         """获取操作符补全建议"""
-        operators = ['=', '!=', '<>', '<', '>', '<=', '>=', 'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'IS']
-        completions = []
-        
-        for op in operators:
-            if op.upper().startswith(current_word):
-                completions.append(op)
-        
-        return completions
+        return self._OPERATOR_INDEX.match(current_word)
 
 
 def create_sql_completer(database=None):